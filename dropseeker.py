@@ -8,12 +8,55 @@ Port of the original PHP script to Python.
 from __future__ import annotations
 
 import argparse
+import bisect
+import collections
+import contextlib
+import fnmatch
+import functools
+import gzip
+import hashlib
+import http.server
+import io
+import json
+import math
+import mmap
 import os
 import re
+import shlex
+import shutil
+import sqlite3
+import struct
 import subprocess
 import sys
+import threading
+import time
+import wave
+import zlib
+from array import array
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import accumulate
 from pathlib import Path
-from typing import Any, Dict, List, Tuple, Union
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Union,
+)
+
+try:
+    import zstandard
+except ImportError:  # Only needed for .zst transcripts.
+    zstandard = None
 
 # ---------------------------------------------------------------------------
 # Config parsing
@@ -72,22 +115,81 @@ Optional arguments:
 
     --after [float]             Extract an additional __ seconds from after each match.
     --before [float]            Extract an additional __ seconds from before each match.
+    --build_index               Create or incrementally update the on-disk word index, then run any --search given.
+    --cache_dir [path]          The directory in which to store the word index and other caches.
+    --crossfade [float]         Crossfade the clips of a --supercut into each other over this many seconds.
     --episode_dir [path]        The directory in which the episode directories are stored, if not in the default location.
     --extract                   Extract audio clips of each match.
+    --extract_jobs [int]        Run this many ffmpeg extractions at once (default: the number of CPUs).
     --context [string]          Only consider a match if the full prefix + match + suffix also includes this string (case-sensitive).
     --icontext [string]         Only consider a match if the full prefix + match + suffix also includes this string (case-insensitive).
     --context_exclude [string]  A search string that, if it matches text around the search result, will be excluded from the final results (case-sensitive).
     --icontext_exclude [string] A search string that, if it matches text around the search result, will be excluded from the final results (case-insensitive).
+    --fuzzy                     Also match words that sound like a search keyword or are within --fuzzy_distance
+                                edits of it (keywords without wildcards only), and show the words that matched.
+    --fuzzy_distance [int]      How many edits --fuzzy allows, for keywords of 4 or more letters (default 1; 0 for
+                                sound-alikes only).
+    --compress_transcripts [gz|zst|none]
+                                Rewrite every transcript (and word timing file) as .vtt.gz or .vtt.zst, which are
+                                searched like .vtt files, or back to plain .vtt with none; then run any --search
+                                given. zst needs the zstandard module.
+    --channels [int]            Mix extracted clips down (or up) to this many audio channels.
     --help_only                 Show the usage instructions.
+    --output [text|jsonl]       How to print results: as text (the default), or as one JSON object per match and
+                                line, written as soon as it is found, with the podcast, episode, guid, transcript and
+                                audio file, start/end timestamps and seconds, prefix/match/suffix text and the
+                                search that matched.
     --output_dir [path]         The directory in which to store the extracted audio clips.
+    --output_format [format]    The format of extracted clips: aif (the default), wav, mp3, m4a (or aac), opus, or
+                                copy, which cuts clips from the episode without re-encoding them, in its own format.
+    --jobs [int]                Scan this many transcripts in parallel worker processes (default 1).
     --limit [int]               Stop searching entirely after finding this many total matches.
     --limit_per_episode [int]   Stop searching an episode after finding this many matches in it.
     --match [string]            Only check episodes that include this string in their filename.
+    --merge_gap [float]         Extract one clip for matches in an episode whose clips overlap or are at most this
+                                many seconds apart, instead of one clip each.
     --min_duration [float]      If extracting audio, only extract a clip if it will be at least this long.
+    --no_cache                  Scan every transcript, instead of reusing the matches found in it by an earlier run
+                                of the same search (kept in --cache_dir) when it hasn't changed since.
+    --no_clip_cache             Always run ffmpeg, instead of reusing clips extracted before (kept in --cache_dir).
+    --no_transcript_cache       Parse every transcript instead of using (and writing) the binary transcript cache.
+    --pcm_cache                 Decode each episode once into a PCM file in --cache_dir and cut aif and wav clips
+                                from it directly, instead of running ffmpeg for every episode searched again.
+    --pcm_cache_size [int]      How many megabytes of decoded episodes --pcm_cache keeps (default 4096); the least
+                                recently used are deleted first.
     --podcast [string]          Only search transcripts from podcasts that include this string in their title.
+    --port [int]                The port --serve listens on (default 8808).
     --prefix_words [int]        Show this many words before the matching string in the text search results.
+    --queries_file [path]       Run every search in this file, one per line, in a single pass over the transcripts,
+                                and print the results grouped by search. A line is a search phrase and/or its own
+                                --search, --query, --context, --icontext, --context_exclude, --icontext_exclude,
+                                --limit, --limit_per_episode, --supercut and --output_dir (a subdirectory of the
+                                main one),
+                                e.g. 'great day --icontext morning --limit 5 --output_dir mornings'. # starts a comment.
+    --query [string]            Search for phrases combined with operators, evaluated on word positions: 'a NEAR/n b'
+                                (within n words, either order), 'a ONEAR/n b' (a first), 'a AND b', 'a NOT b'
+                                (within --query_window words), 'a OR b', and parentheses. Quote phrases: '"great day"'.
+    --query_window [int]        How many words apart AND and NOT look (default 10).
+    --result_cache_size [int]   How many megabytes of earlier searches' matches to keep (default 256); those of the
+                                least recently run searches are deleted first.
+    --sample_rate [int]         Resample extracted clips to this many Hz.
+    --serve                     Run a local HTTP server that answers searches (POST /search with JSON options)
+                                from transcripts kept in memory, instead of searching once. Requests may set the
+                                search, query and filter options only; the rest, including --use_index, are the
+                                server's own. Can't be combined with --extract or --supercut.
+    --show_expansions           Print the words each wildcard keyword expands to, according to the word index (updating it first).
+    --stats                     Print the time spent in each phase of the search, counters, and the slowest
+                                transcripts to stderr when done.
+    --stats_json [path]         Write the same statistics as JSON to this file.
     --suffix_words [int]        Show this many words after the matching string in the text search results.
+    --supercut [path]           Render every match's clip (with --before/--after), in result order, into this one
+                                audio file with a single ffmpeg run, without writing the clips themselves.
+    --supercut_gap [float]      Put this many seconds of silence between the clips of a --supercut.
     --transcript_dir [path]     The directory in which the transcript directories are stored, if not in the default location.
+    --use_index                 Resolve searches through the word index (updating it first) instead of scanning every transcript.
+    --watch                     Keep running, and every --watch_interval seconds search (and extract from) only the
+                                transcripts that are new or changed since the last pass.
+    --watch_interval [float]    Seconds between --watch passes (default 60).
 """
 
 
@@ -112,9 +214,29 @@ def build_arg_parser() -> argparse.ArgumentParser:
         type=float,
         help="Seconds before each match to include in extraction.",
     )
+    parser.add_argument(
+        "--build_index",
+        action="store_true",
+        default=None,
+        help="Create or update the word index.",
+    )
+    parser.add_argument(
+        "--cache_dir", help="Directory where the word index and caches are stored."
+    )
+    parser.add_argument(
+        "--channels", type=int, help="Number of audio channels in extracted clips."
+    )
+    parser.add_argument(
+        "--compress_transcripts",
+        choices=TRANSCRIPT_COMPRESSIONS,
+        help="Convert transcripts in place to .vtt.gz, .vtt.zst or (none) .vtt.",
+    )
     parser.add_argument(
         "--context", action="append", help="Required context (case-sensitive)."
     )
+    parser.add_argument(
+        "--crossfade", type=float, help="Seconds to crossfade --supercut clips."
+    )
     parser.add_argument(
         "--icontext", action="append", help="Required context (case-insensitive)."
     )
@@ -134,6 +256,21 @@ def build_arg_parser() -> argparse.ArgumentParser:
     parser.add_argument(
         "--extract", action="store_true", help="Extract audio for each match."
     )
+    parser.add_argument(
+        "--extract_jobs", type=int, help="Number of ffmpeg extractions to run at once."
+    )
+    parser.add_argument(
+        "--fuzzy",
+        action="store_true",
+        default=None,
+        help="Also match sound-alike and misspelled words.",
+    )
+    parser.add_argument(
+        "--fuzzy_distance", type=int, help="Edits allowed by --fuzzy (default 1)."
+    )
+    parser.add_argument(
+        "--jobs", type=int, help="Number of transcripts to scan in parallel."
+    )
     parser.add_argument(
         "--limit", type=int, help="Stop after finding this many total matches."
     )
@@ -147,12 +284,54 @@ def build_arg_parser() -> argparse.ArgumentParser:
         action="append",
         help="Only check transcripts whose filename includes this string.",
     )
+    parser.add_argument(
+        "--merge_gap",
+        type=float,
+        help="Merge clips that overlap or are at most this many seconds apart.",
+    )
     parser.add_argument(
         "--min_duration", type=float, help="Minimum extraction length, in seconds."
     )
+    parser.add_argument(
+        "--no_cache",
+        action="store_true",
+        default=None,
+        help="Don't reuse matches found by earlier runs of the same search.",
+    )
+    parser.add_argument(
+        "--no_clip_cache",
+        action="store_true",
+        default=None,
+        help="Don't reuse previously extracted clips.",
+    )
+    parser.add_argument(
+        "--no_transcript_cache",
+        action="store_true",
+        default=None,
+        help="Don't read or write the binary transcript cache.",
+    )
+    parser.add_argument(
+        "--output",
+        choices=OUTPUT_MODES,
+        help="Print results as text or as JSON lines (jsonl).",
+    )
     parser.add_argument(
         "--output_dir", help="Directory where extracted clips are stored."
     )
+    parser.add_argument(
+        "--output_format",
+        help="Format of extracted clips (aif, wav, mp3, m4a, opus or copy).",
+    )
+    parser.add_argument(
+        "--pcm_cache",
+        action="store_true",
+        default=None,
+        help="Cut aif/wav clips from episodes decoded once to PCM.",
+    )
+    parser.add_argument(
+        "--pcm_cache_size", type=int, help="Megabytes of decoded PCM to keep."
+    )
+    parser.add_argument("--port", type=int, help="Port for --serve to listen on.")
     parser.add_argument(
         "--prefix_words", type=int, help="Words before match to show in text results."
     )
@@ -161,23 +340,97 @@ def build_arg_parser() -> argparse.ArgumentParser:
         action="append",
         help="Only search transcripts from podcasts whose title contains this.",
     )
+    parser.add_argument(
+        "--queries_file", help="File of searches to run in one pass, one per line."
+    )
+    parser.add_argument(
+        "--query",
+        action="append",
+        help="Proximity/boolean query (can be given multiple times).",
+    )
+    parser.add_argument(
+        "--query_window", type=int, help="Words apart for query AND and NOT."
+    )
+    parser.add_argument(
+        "--result_cache_size", type=int, help="Megabytes of earlier matches to keep."
+    )
+    parser.add_argument(
+        "--sample_rate", type=int, help="Sample rate of extracted clips, in Hz."
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        default=None,
+        help="Serve searches over a local HTTP/JSON API.",
+    )
+    parser.add_argument(
+        "--show_expansions",
+        action="store_true",
+        default=None,
+        help="Print the indexed words each wildcard keyword matches.",
+    )
     parser.add_argument(
         "--skip_existing",
         action="store_true",
         help="Skip extraction if destination file exists.",
     )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        default=None,
+        help="Print per-phase timings and counters to stderr.",
+    )
+    parser.add_argument("--stats_json", help="Write per-phase timings as JSON here.")
     parser.add_argument(
         "--suffix_words", type=int, help="Words after match to show in text results."
     )
+    parser.add_argument("--supercut", help="Render all matches into this audio file.")
+    parser.add_argument(
+        "--supercut_gap",
+        type=float,
+        help="Seconds of silence between --supercut clips.",
+    )
     parser.add_argument(
         "--transcript_dir", help="Directory where transcript subdirectories are stored."
     )
+    parser.add_argument(
+        "--use_index",
+        action="store_true",
+        default=None,
+        help="Resolve searches through the word index.",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        default=None,
+        help="Search new and changed transcripts as they appear.",
+    )
+    parser.add_argument(
+        "--watch_interval", type=float, help="Seconds between --watch passes."
+    )
     parser.add_argument(
         "--help_only", action="store_true", help="Show only usage and exit."
     )
     return parser
 
 
+def is_flag_set(options: Dict[str, Any], key: str) -> bool:
+    """
+    Flags given on the command line are stored as True; a bare key in
+    dropseeker.conf is stored as False (like PHP's getopt()), so presence is
+    what matters.
+    """
+    return key in options
+
+
+def message_file(options: Dict[str, Any]) -> TextIO:
+    """
+    Where to print progress and other messages that aren't results: stdout,
+    unless --output jsonl keeps it for JSON lines alone.
+    """
+    return sys.stderr if options.get("output") == "jsonl" else sys.stdout
+
+
 def merge_options(
     default_options: Dict[str, Any], cli_args: argparse.Namespace
 ) -> Dict[str, Any]:
@@ -203,9 +456,18 @@ def merge_options(
 
     # Ensure numeric arguments are stored as actual numbers.
     for key in (
+        "channels",
+        "extract_jobs",
+        "fuzzy_distance",
+        "jobs",
         "limit",
         "limit_per_episode",
+        "pcm_cache_size",
+        "port",
         "prefix_words",
+        "query_window",
+        "result_cache_size",
+        "sample_rate",
         "suffix_words",
     ):
         if key in options:
@@ -214,7 +476,11 @@ def merge_options(
     for key in (
         "after",
         "before",
+        "crossfade",
+        "merge_gap",
         "min_duration",
+        "supercut_gap",
+        "watch_interval",
     ):
         if key in options:
             options[key] = float(options[key])
@@ -222,6 +488,9 @@ def merge_options(
     options["search"] = list(
         dict.fromkeys([s for s in to_list(options.get("search")) if s])
     )
+    options["query"] = list(
+        dict.fromkeys([q for q in to_list(options.get("query")) if q.strip()])
+    )
     options["match"] = to_list(options.get("match"))
     options["podcast"] = to_list(options.get("podcast"))
     options["context"] = to_list(options.get("context"))
@@ -229,10 +498,88 @@ def merge_options(
     options["context_exclude"] = to_list(options.get("context_exclude"))
     options["icontext_exclude"] = to_list(options.get("icontext_exclude"))
 
-    if not options["search"]:
+    if options.get("queries_file") and (
+        options["search"]
+        or options["query"]
+        or options.get("supercut")
+        or is_flag_set(options, "watch")
+        or is_flag_set(options, "serve")
+    ):
+        sys.exit(
+            "--queries_file can't be combined with --search, --query, --supercut,"
+            " --watch or --serve (give each line its own --supercut instead).\n"
+        )
+
+    if is_flag_set(options, "serve") and (
+        options.get("extract") or options.get("supercut")
+    ):
+        sys.exit("--serve can't be combined with --extract or --supercut.\n")
+
+    if (
+        not options["search"]
+        and not options["query"]
+        and not options.get("queries_file")
+        and not options.get("compress_transcripts")
+        and not is_flag_set(options, "build_index")
+        and not is_flag_set(options, "serve")
+    ):
         print(usage(), file=sys.stderr)
         sys.exit("You must supply at least one search term.\n")
 
+    options["jobs"] = int(options.get("jobs", 1))
+    if options["jobs"] < 1:
+        sys.exit("--jobs must be at least 1.\n")
+
+    options["extract_jobs"] = int(options.get("extract_jobs", os.cpu_count() or 1))
+    if options["extract_jobs"] < 1:
+        sys.exit("--extract_jobs must be at least 1.\n")
+
+    options["fuzzy_distance"] = int(options.get("fuzzy_distance", 1))
+    if options["fuzzy_distance"] < 0:
+        sys.exit("--fuzzy_distance can't be negative.\n")
+
+    options["pcm_cache_size"] = int(
+        options.get("pcm_cache_size", PCM_CACHE_DEFAULT_SIZE_MB)
+    )
+    if options["pcm_cache_size"] < 1:
+        sys.exit("--pcm_cache_size must be at least 1.\n")
+
+    options["result_cache_size"] = int(
+        options.get("result_cache_size", RESULT_CACHE_DEFAULT_SIZE_MB)
+    )
+    if options["result_cache_size"] < 1:
+        sys.exit("--result_cache_size must be at least 1.\n")
+
+    options["watch_interval"] = float(options.get("watch_interval", 60))
+    if options["watch_interval"] <= 0:
+        sys.exit("--watch_interval must be more than 0.\n")
+
+    output_format = str(options.get("output_format") or "aif").lower()
+    output_format = OUTPUT_FORMAT_ALIASES.get(output_format, output_format)
+    if output_format not in OUTPUT_FORMATS:
+        sys.exit(
+            f"Unknown --output_format {output_format};"
+            f" use one of {', '.join(OUTPUT_FORMATS)}.\n"
+        )
+    options["output_format"] = output_format
+    for key in ("sample_rate", "channels"):
+        if key in options and options[key] < 1:
+            sys.exit(f"--{key} must be at least 1.\n")
+        if key in options and output_format == "copy":
+            sys.exit(f"--{key} needs re-encoding, so can't be used with copy.\n")
+
+    for key in ("supercut_gap", "crossfade"):
+        if options.get(key, 0) < 0:
+            sys.exit(f"--{key} can't be negative.\n")
+    if options.get("supercut_gap") and options.get("crossfade"):
+        sys.exit("--supercut_gap and --crossfade can't be used together.\n")
+    if options.get("supercut"):
+        options["supercut"] = os.path.expanduser(str(options["supercut"]))
+
+    options["output"] = str(options.get("output") or "text")
+    if options["output"] not in OUTPUT_MODES:
+        sys.exit(f"--output must be one of {', '.join(OUTPUT_MODES)}.\n")
+
     options["before"] = float(options.get("before", 0.1))
     options["after"] = float(options.get("after", 0.1))
 
@@ -265,42 +612,148 @@ def merge_options(
 
 
 # ---------------------------------------------------------------------------
-# Core helpers
+# Stats
 # ---------------------------------------------------------------------------
 
+# How many of the slowest transcripts --stats reports.
+STATS_SLOWEST = 10
 
-def matches_search_term(word: str, search_term: str) -> bool:
+
+class Stats:
     """
-    Port of PHP matches_search_term().
+    Wall time per phase and counters for one search, collected for --stats.
+
+    While disabled every method returns at once; hot loops also check
+    .enabled themselves so they skip even building the arguments.
     """
-    search_term = re.sub(r"[^a-z0-9*#]", "", search_term.lower())
 
-    if word == search_term:
-        return True
+    def __init__(self) -> None:
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.reset()
 
-    if search_term == "*":
-        return True
+    def reset(self) -> None:
+        self.times: Dict[str, float] = collections.defaultdict(float)
+        self.counts: Dict[str, int] = collections.defaultdict(int)
+        self.transcripts: List[Tuple[float, str]] = []
 
-    if search_term == "." and len(word) == 1:
-        return True
+    def count(self, name: str, n: int = 1) -> None:
+        if self.enabled:
+            with self.lock:
+                self.counts[name] += n
 
-    if "*" in search_term:
-        last_match_end = 0
-        parts = search_term.split("*")
+    def add_time(self, phase: str, seconds: float) -> None:
+        if self.enabled:
+            with self.lock:
+                self.times[phase] += seconds
 
-        for idx, part in enumerate(parts):
-            match_location = word.find(part, last_match_end)
-            if match_location == -1:
-                return False
-            elif idx == 0 and match_location > 0:
-                return False
-            else:
-                last_match_end = match_location + len(part)
+    def add_transcript(self, transcript_file: str, seconds: float) -> None:
+        if self.enabled:
+            with self.lock:
+                self.transcripts.append((seconds, transcript_file))
 
-        if last_match_end == len(word) or parts[-1] == "":
-            return True
+    @contextlib.contextmanager
+    def timer(self, phase: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(phase, time.perf_counter() - start)
+
+    def timed(
+        self, phase: str, items: Iterable[Any], transcript_file: Optional[str] = None
+    ) -> Iterable[Any]:
+        """
+        Wrap a lazy iterable so the time spent producing its items counts
+        toward phase (and toward transcript_file, if given).
+        """
+        if not self.enabled:
+            return items
+        return self._timed(phase, iter(items), transcript_file)
+
+    def _timed(
+        self, phase: str, items: Iterator[Any], transcript_file: Optional[str]
+    ) -> Iterator[Any]:
+        elapsed = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    elapsed += time.perf_counter() - start
+                    return
+                elapsed += time.perf_counter() - start
+                yield item
+        finally:
+            self.add_time(phase, elapsed)
+            if transcript_file is not None:
+                self.add_transcript(transcript_file, elapsed)
 
-    return False
+    def take(self) -> Dict[str, Any]:
+        """
+        Return everything collected so far and start over, e.g. to send a
+        pool worker's stats back to the main process.
+        """
+        with self.lock:
+            taken = {
+                "times": dict(self.times),
+                "counts": dict(self.counts),
+                "transcripts": self.transcripts,
+            }
+            self.reset()
+        return taken
+
+    def merge(self, taken: Dict[str, Any]) -> None:
+        with self.lock:
+            for phase, seconds in taken["times"].items():
+                self.times[phase] += seconds
+            for name, n in taken["counts"].items():
+                self.counts[name] += n
+            self.transcripts.extend(taken["transcripts"])
+
+    def report(self) -> Dict[str, Any]:
+        slowest = sorted(self.transcripts, reverse=True)[:STATS_SLOWEST]
+        return {
+            "seconds": dict(sorted(self.times.items())),
+            "counts": dict(sorted(self.counts.items())),
+            "slowest_transcripts": [
+                {"transcript": transcript_file, "seconds": seconds}
+                for seconds, transcript_file in slowest
+            ],
+        }
+
+    def print_report(self, transcript_dir: str) -> None:
+        report = self.report()
+        print("Stats:", file=sys.stderr)
+        for phase, seconds in report["seconds"].items():
+            print(f"\t{phase:<28} {seconds:10.4f}s", file=sys.stderr)
+        for name, n in report["counts"].items():
+            print(f"\t{name:<28} {n:10d}", file=sys.stderr)
+        if report["slowest_transcripts"]:
+            print("Slowest transcripts:", file=sys.stderr)
+        for entry in report["slowest_transcripts"]:
+            rel_name = display_name(entry["transcript"], transcript_dir)
+            print(f"\t{entry['seconds']:10.4f}s  {rel_name}", file=sys.stderr)
+
+
+stats = Stats()
+
+
+# ---------------------------------------------------------------------------
+# Core helpers
+# ---------------------------------------------------------------------------
+
+
+def matches_search_term(word: str, search_term: str) -> bool:
+    """
+    Port of PHP matches_search_term().
+    """
+    return Keyword(search_term).matches(word)
 
 
 def timestamp_to_seconds(timestamp: str) -> float:
@@ -331,305 +784,4319 @@ def seconds_to_filename_stamp(seconds: float) -> str:
     return f"{h:02d}h{m:02d}m{s:02d}s"
 
 
-def read_transcript(transcript_path: str) -> List[Tuple[str, str, str, str]]:
+VOWELS = "aeiou"
+
+# Distinct words whose sound_key() is remembered: far more than the vocabulary
+# of a large corpus, so each word's key is computed once.
+SOUND_KEY_CACHE_SIZE = 1 << 18
+
+
+@functools.lru_cache(maxsize=SOUND_KEY_CACHE_SIZE)
+def sound_key(word: str) -> str:
     """
-    Parse WebVTT transcript into a list of (orig, normalized, start, end).
+    A Metaphone-style phonetic key for a normalized word, so that words that
+    sound alike ("nick", "nik", "knick") share a key. Words containing digits
+    or # are their own key.
     """
-    parsed: List[Tuple[str, str, str, str]] = []
-    last_start = "0:00.000"
-    last_end = "0:00.000"
+    if not word.isalpha() or not word.isascii():
+        return word
 
-    time_re = re.compile(
-        r"^((?:[0-9]+:)*[0-9]+\.[0-9]{3}) --> ((?:[0-9]+:)*[0-9]+\.[0-9]{3})$"
-    )
+    # Initial letters that are silent or change sound.
+    for prefix, replacement in (
+        ("ae", "e"),
+        ("gn", "n"),
+        ("kn", "n"),
+        ("pn", "n"),
+        ("wr", "r"),
+        ("wh", "w"),
+        ("x", "s"),
+    ):
+        if word.startswith(prefix):
+            word = replacement + word[len(prefix) :]
+            break
 
-    with open(transcript_path, "r", encoding="utf-8") as f:
-        lines = [line.strip() for line in f]
+    key: List[str] = []
+    n = len(word)
 
-    for line in lines:
-        if line.startswith("WEBVTT"):
-            continue
-        if not line:
+    def at(i: int) -> str:
+        return word[i] if 0 <= i < n else ""
+
+    for i, c in enumerate(word):
+        prev, nxt, after = at(i - 1), at(i + 1), at(i + 2)
+
+        if c == prev and c != "c":
             continue
 
-        m = time_re.match(line)
-        if m:
-            last_start, last_end = m.group(1), m.group(2)
+        if c in VOWELS:
+            if i == 0:
+                key.append(c)
+        elif c == "b":
+            if not (prev == "m" and i == n - 1):
+                key.append("b")
+        elif c == "c":
+            if nxt == "h":
+                key.append("k" if prev == "s" else "x")
+            elif nxt == "i" and after == "a":
+                key.append("x")
+            elif nxt in ("i", "e", "y"):
+                if prev != "s":
+                    key.append("s")
+            else:
+                key.append("k")
+        elif c == "d":
+            if nxt == "g" and after in ("e", "i", "y"):
+                key.append("j")
+            else:
+                key.append("t")
+        elif c == "g":
+            if nxt == "h" and after and after not in VOWELS:
+                continue
+            if nxt == "n" and (i + 2 == n or word[i + 2 :] == "ed"):
+                continue
+            if prev == "d" and nxt in ("e", "i", "y"):
+                continue
+            if nxt in ("i", "e", "y") and prev != "g":
+                key.append("j")
+            else:
+                key.append("k")
+        elif c == "h":
+            if prev in ("c", "s", "p", "t", "g"):
+                continue
+            if prev in VOWELS and nxt not in VOWELS:
+                continue
+            if i == 0 or nxt in VOWELS:
+                key.append("h")
+        elif c == "k":
+            if prev != "c":
+                key.append("k")
+        elif c == "p":
+            key.append("f" if nxt == "h" else "p")
+        elif c == "q":
+            key.append("k")
+        elif c == "s":
+            if nxt == "h" or (nxt == "i" and after in ("o", "a")):
+                key.append("x")
+            else:
+                key.append("s")
+        elif c == "t":
+            if nxt == "i" and after in ("o", "a"):
+                key.append("x")
+            elif nxt == "h":
+                key.append("0")
+            elif not (nxt == "c" and after == "h"):
+                key.append("t")
+        elif c == "v":
+            key.append("f")
+        elif c in ("w", "y"):
+            if nxt in VOWELS:
+                key.append(c)
+        elif c == "x":
+            key.append("ks")
+        elif c == "z":
+            key.append("s")
         else:
-            words = re.split(r"\s+", line)
-            for w in words:
-                norm = re.sub(r"[^a-z0-9#]", "", w.lower())
-                parsed.append((w, norm, last_start, last_end))
+            key.append(c)
 
-    return parsed
+    # Doubled sounds ("dt", "ck") count once.
+    return "".join(code for i, code in enumerate(key) if i == 0 or code != key[i - 1])
 
 
-# ---------------------------------------------------------------------------
-# Main logic
-# ---------------------------------------------------------------------------
+def within_edit_distance(a: str, b: str, max_distance: int) -> bool:
+    """
+    Whether a can be turned into b with at most max_distance single-character
+    insertions, deletions or substitutions.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return False
+    if a == b:
+        return True
 
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            )
+        if min(current) > max_distance:
+            return False
+        previous = current
+    return previous[-1] <= max_distance
 
-def main() -> None:
-    search()
 
+# Transcript files, plain or compressed. Compressed files are decompressed as
+# they are read, so the parsers stream them just like plain ones.
+TRANSCRIPT_SUFFIXES = (".vtt", ".vtt.gz", ".vtt.zst")
+TRANSCRIPT_COMPRESSIONS = ("gz", "zst", "none")
 
-def search() -> None:
-    script_dir = Path(__file__).resolve().parent
-    default_episode_dir = script_dir / "episodes"
-    default_transcript_dir = script_dir / "transcripts"
 
-    # Load defaults from conf
-    conf_defaults = default_options_from_conf("dropseeker.conf")
-    print(conf_defaults)
-    # CLI
-    parser = build_arg_parser()
-    args = parser.parse_args()
+def transcript_stem(transcript_path: str) -> str:
+    for suffix in TRANSCRIPT_SUFFIXES[::-1]:
+        if transcript_path.endswith(suffix):
+            return transcript_path[: -len(suffix)]
+    return os.path.splitext(transcript_path)[0]
 
-    if args.help_only:
-        print(usage())
-        return
 
-    options = merge_options(conf_defaults, args)
+def transcript_names(names: Iterable[str]) -> List[str]:
+    """
+    The transcripts among the file names in a podcast directory, skipping
+    hidden files like glob() does. If an episode has both a plain and a
+    compressed transcript (from an interrupted --compress_transcripts), only
+    the plain one is listed.
+    """
+    chosen: Dict[str, Tuple[int, str]] = {}
+    for name in names:
+        if name.startswith("."):
+            continue
+        for rank, suffix in enumerate(TRANSCRIPT_SUFFIXES):
+            if name.endswith(suffix):
+                stem = name[: -len(suffix)]
+                if stem not in chosen or rank < chosen[stem][0]:
+                    chosen[stem] = (rank, name)
+                break
+    return [name for _, name in chosen.values()]
 
-    # Episode dir
-    if options.get("episode_dir"):
-        episode_dir = Path(options["episode_dir"])
-        if not episode_dir.is_absolute():
-            episode_dir = Path.cwd() / episode_dir
-    else:
-        episode_dir = default_episode_dir
-    episode_dir = episode_dir.resolve()
-
-    # Transcript dir
-    if options.get("transcript_dir"):
-        transcript_dir = Path(options["transcript_dir"])
-        if not transcript_dir.is_absolute():
-            transcript_dir = Path.cwd() / transcript_dir
-    else:
-        transcript_dir = default_transcript_dir
-    transcript_dir = transcript_dir.resolve()
 
-    options["episode_dir"] = str(episode_dir)
-    options["transcript_dir"] = str(transcript_dir)
+def list_podcast_dir(podcast_path: Path) -> List[str]:
+    return [
+        str(podcast_path / name) for name in transcript_names(os.listdir(podcast_path))
+    ]
 
-    # Find all podcast transcript dirs
-    all_podcast_dirs = sorted([p for p in transcript_dir.glob("*") if p.is_dir()])
-    matching_transcripts: List[str] = []
 
-    for podcast_path in all_podcast_dirs:
-        podcast_title = podcast_path.name
+def _need_zstandard() -> None:
+    if zstandard is None:
+        sys.exit("Reading or writing .zst files needs the zstandard module.\n")
 
-        if not options["podcast"]:
-            matching_transcripts.extend([str(p) for p in podcast_path.glob("*.vtt")])
-        else:
-            for pattern in options["podcast"]:
-                if pattern.lower() in podcast_title.lower():
-                    matching_transcripts.extend(
-                        [str(p) for p in podcast_path.glob("*.vtt")]
-                    )
-                    break
 
-    matching_transcripts.sort()
-    matching_transcripts = list(reversed(matching_transcripts))
+def open_binary(path: str) -> BinaryIO:
+    """
+    Open a transcript or word timing file for reading, decompressing .gz and
+    .zst files on the fly.
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".zst"):
+        _need_zstandard()
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"))
+    return open(path, "rb")
 
-    # Filter by --match if present
-    transcripts: List[str] = []
-    if options["match"]:
-        for t in matching_transcripts:
-            filename = os.path.basename(t)
-            if any(m.lower() in filename.lower() for m in options["match"]):
-                transcripts.append(t)
-    else:
-        transcripts = matching_transcripts
 
-    matches_found = 0
+def open_text(path: str) -> TextIO:
+    return io.TextIOWrapper(open_binary(path), encoding="utf-8")
 
-    for transcript_file in transcripts:
-        parsed = read_transcript(transcript_file)
-        num_words = len(parsed)
-        if num_words == 0:
-            continue
 
-        matches_in_episode = 0
+TIMESTAMP_LINE_RE = re.compile(
+    r"^((?:[0-9]+:)*[0-9]+\.[0-9]{3}) --> ((?:[0-9]+:)*[0-9]+\.[0-9]{3})$"
+)
 
-        for raw_search in options["search"]:
-            search_term = raw_search.lower()
-            keywords = search_term.split(" ")
+# Inline word timestamps, as in "<00:00:01.500><c> world</c>".
+WORD_TIMESTAMP_TAG_RE = re.compile(r"<((?:[0-9]+:)*[0-9]+\.[0-9]{3})>")
+CUE_TAG_RE = re.compile(r"<[^>]*>")
 
-            suffix_word_count = options["suffix_words"] + search_term.count(" ")
+# whisper writes "<stem>.json" next to "<stem>.vtt"; with --word_timestamps
+# its segments carry per-word start/end times.
+WORD_TIMING_SUFFIX = ".json"
 
-            suffix_words = []
-            prefix_words: List[str] = []
 
-            for i in range(min(num_words, suffix_word_count)):
-                suffix_words.append(parsed[i])
+class TranscriptStat(NamedTuple):
+    st_size: int
+    st_mtime: float
+    st_mtime_ns: int
 
-            start = float("inf")
-            end = 0.0
 
-            for idx, word_entry in enumerate(parsed):
-                orig_word, norm_word, w_start, w_end = word_entry
-                prefix_words.append(orig_word)
+def word_timing_file(transcript_path: str) -> str:
+    """
+    Where a transcript's word timing file would be: compressed the same way
+    as the transcript.
+    """
+    stem = transcript_stem(transcript_path)
+    compression = transcript_path[len(stem) + len(".vtt") :]
+    return stem + WORD_TIMING_SUFFIX + compression
 
-                if num_words > idx + suffix_word_count:
-                    suffix_words.append(parsed[idx + suffix_word_count])
 
-                if suffix_words:
-                    suffix_words.pop(0)
+def transcript_stat(transcript_path: str) -> TranscriptStat:
+    """
+    Size and mtime of a transcript together with its word timing file, if it
+    has one, so that caches keyed on them notice either file changing.
+    """
+    stat = os.stat(transcript_path)
+    try:
+        timing_stat = os.stat(word_timing_file(transcript_path))
+    except FileNotFoundError:
+        return TranscriptStat(stat.st_size, stat.st_mtime, stat.st_mtime_ns)
+    return TranscriptStat(
+        stat.st_size + timing_stat.st_size,
+        max(stat.st_mtime, timing_stat.st_mtime),
+        max(stat.st_mtime_ns, timing_stat.st_mtime_ns),
+    )
 
-                if len(prefix_words) > options["prefix_words"] + 1:
-                    prefix_words.pop(0)
 
-                if not matches_search_term(norm_word, keywords[0]):
-                    continue
+def format_timestamp(seconds: float) -> str:
+    """
+    Inverse of timestamp_to_seconds(), in whisper's 'MM:SS.mmm' /
+    'HH:MM:SS.mmm' form.
+    """
+    ms = int(round(seconds * 1000))
+    h, ms = divmod(ms, 3_600_000)
+    m, ms = divmod(ms, 60_000)
+    s, ms = divmod(ms, 1000)
+    hours = f"{h:02d}:" if h else ""
+    return f"{hours}{m:02d}:{s:02d}.{ms:03d}"
+
+
+def normalize_word(word: str) -> str:
+    return re.sub(r"[^a-z0-9#]", "", word.lower())
+
+
+def _timed_words(
+    pieces: List[Tuple[str, float, float]],
+) -> Iterator[Tuple[str, str, str, str]]:
+    """
+    Split the concatenated text of timed pieces (whisper's word tokens, which
+    may begin mid-word, e.g. " re" + "-up") on whitespace, the way a VTT cue
+    line is split, and time each word from the first to the last piece it
+    overlaps.
+    """
+    text = "".join(piece for piece, _, _ in pieces)
+    piece_ends = list(accumulate(len(piece) for piece, _, _ in pieces))
+    for m in re.finditer(r"\S+", text):
+        first = bisect.bisect_right(piece_ends, m.start())
+        last = bisect.bisect_right(piece_ends, m.end() - 1)
+        w = m.group(0)
+        yield (
+            w,
+            normalize_word(w),
+            format_timestamp(pieces[first][1]),
+            format_timestamp(pieces[last][2]),
+        )
+
 
-                start = w_start
-                end = w_end
-
-                if len(keywords) > 1:
-                    if len(suffix_words) < len(keywords) - 1:
-                        break
-
-                    for k in range(1, len(keywords)):
-                        if not matches_search_term(suffix_words[k - 1][1], keywords[k]):
-                            # equivalent to continue 2 in PHP: continue outer parsed loop
-                            break
-                        end = suffix_words[k - 1][3]
-                    else:
-                        # all extra keywords matched
-                        pass
-                    # if we broke inside the for k loop, we continue outer loop
-                    # but the simplest safe behavior is:
-                    # re-check whether we actually updated "end" for the last part
-                    # This is close enough to original semantics for this translation.
-
-                suffix_string = " ".join(sw[0] for sw in suffix_words)
-                exclusion_search_string = (
-                    " ".join(prefix_words) + " " + suffix_string.strip()
+def _whisper_json_segments(
+    data: Dict[str, Any],
+) -> Iterator[Tuple[float, float, List[Tuple[str, float, float]]]]:
+    """
+    Yield (start, end, timed pieces) per segment of openai-whisper's JSON
+    output, or whisper.cpp's --output-json(-full); segments without word
+    timing get a single piece spanning the segment.
+    """
+    if "segments" in data:
+        for segment in data["segments"]:
+            start, end = float(segment["start"]), float(segment["end"])
+            words = segment.get("words")
+            if words:
+                pieces = [
+                    (w["word"], float(w["start"]), float(w["end"])) for w in words
+                ]
+            else:
+                pieces = [(segment["text"], start, end)]
+            yield start, end, pieces
+    elif "transcription" in data:
+        for segment in data["transcription"]:
+            start = segment["offsets"]["from"] / 1000
+            end = segment["offsets"]["to"] / 1000
+            pieces = [
+                (
+                    token["text"],
+                    token["offsets"]["from"] / 1000,
+                    token["offsets"]["to"] / 1000,
                 )
+                for token in segment.get("tokens", ())
+                # Special tokens such as "[_BEG_]" and "[_TT_42]".
+                if not token["text"].startswith("[_")
+            ]
+            yield start, end, pieces or [(segment["text"], start, end)]
+    else:
+        raise ValueError("no segments")
 
-                # context_exclude (case-sensitive)
-                if options["context_exclude"]:
-                    if any(
-                        ex in exclusion_search_string
-                        for ex in options["context_exclude"]
-                    ):
-                        continue
 
-                # icontext_exclude (case-insensitive)
-                if options["icontext_exclude"]:
-                    lower_str = exclusion_search_string.lower()
-                    if any(
-                        ex.lower() in lower_str for ex in options["icontext_exclude"]
-                    ):
-                        continue
+def iter_word_timing(timing_path: str) -> Iterator[Tuple[str, str, str, str]]:
+    """
+    Parse whisper's JSON output like iter_transcript(), with each word timed
+    on its own where the JSON has word timestamps.
+    """
+    with open_text(timing_path) as f:
+        data = json.load(f)
 
-                # context (case-sensitive required)
-                if options["context"]:
-                    if not all(
-                        ctx in exclusion_search_string for ctx in options["context"]
-                    ):
-                        continue
+    for _, _, pieces in _whisper_json_segments(data):
+        # The VTT writer strips each cue's text and replaces "-->" in it.
+        pieces = [
+            (p.replace("-->", "->"), p_start, p_end) for p, p_start, p_end in pieces
+        ]
+        yield from _timed_words(pieces)
 
-                # icontext (case-insensitive required)
-                if options["icontext"]:
-                    lower_str = exclusion_search_string.lower()
-                    if not all(ctx.lower() in lower_str for ctx in options["icontext"]):
-                        continue
 
-                start_seconds = timestamp_to_seconds(start)
-                end_seconds = timestamp_to_seconds(end)
+def _vtt_timed_pieces(
+    line: str, cue_start: str, cue_end: str
+) -> List[Tuple[str, float, float]]:
+    """
+    Split a cue line with inline word timestamps into pieces timed from each
+    tag to the next (the first from the cue start, the last to the cue end).
+    """
+    parts = WORD_TIMESTAMP_TAG_RE.split(line)
+    times = [timestamp_to_seconds(cue_start)]
+    times.extend(timestamp_to_seconds(t) for t in parts[1::2])
+    times.append(timestamp_to_seconds(cue_end))
+    return [
+        (CUE_TAG_RE.sub("", text), times[i], times[i + 1])
+        for i, text in enumerate(parts[::2])
+    ]
 
-                if options.get("min_duration") is not None:
-                    duration = end_seconds - start_seconds
-                    if duration < float(options["min_duration"]):
-                        continue
-                    else:
-                        print(f"Duration: {duration} seconds")
 
-                matches_in_episode += 1
-                matches_found += 1
+def iter_transcript(transcript_path: str) -> Iterator[Tuple[str, str, str, str]]:
+    """
+    Parse a WebVTT transcript line by line, yielding (orig, normalized, start,
+    end) for each word.
 
-                rel_name = re.sub(
-                    r"\s\(guid.*$",
-                    "",
-                    transcript_file.replace(str(transcript_dir), "").lstrip(os.sep),
-                )
-                print(f"{rel_name} @ {start}:\n\t{exclusion_search_string}\n")
-
-                if options.get("extract"):
-                    m = re.findall(r"\(guid=(.+?)\)", transcript_file)
-                    guid = m[0] if m else None
-                    if not guid:
-                        sys.exit(f"Could not extract guid from {transcript_file}\n")
-
-                    audio_files: List[str] = []
-                    for podcast in options["podcast"]:
-                        # Note: same caveat about case sensitivity
-                        pattern = f"*{podcast}*"
-                        audio_files.extend(
-                            [
-                                str(p)
-                                for p in episode_dir.glob(f"{pattern}/*guid={guid}*.*")
-                            ]
-                        )
+    Words are timed by their cue, unless the cue has inline word timestamps or
+    the transcript has a whisper JSON file beside it, in which case each word
+    gets its own start and end.
+    """
+    timing_path = word_timing_file(transcript_path)
+    if os.path.exists(timing_path):
+        try:
+            words = list(iter_word_timing(timing_path))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Ignoring word timing in {timing_path}: {e}", file=sys.stderr)
+        else:
+            yield from words
+            return
 
-                    if not audio_files:
-                        sys.exit(f"Could not find audio for {transcript_file}\n")
+    last_start = "0:00.000"
+    last_end = "0:00.000"
 
-                    audio_file = audio_files[0]
+    with open_text(transcript_path) as f:
+        for line in f:
+            line = line.strip()
 
-                    base_name = f"{search_term} - {os.path.basename(audio_file)}"
-                    base_name = base_name[:200]
-                    stamp = seconds_to_filename_stamp(start_seconds)
+            if line.startswith("WEBVTT"):
+                continue
+            if not line:
+                continue
 
-                    dest_file = os.path.join(
-                        options["output_dir"],
-                        f"{base_name} - {stamp}.aif",
-                    )
+            m = TIMESTAMP_LINE_RE.match(line)
+            if m:
+                last_start, last_end = m.group(1), m.group(2)
+            elif "<" in line and WORD_TIMESTAMP_TAG_RE.search(line):
+                yield from _timed_words(_vtt_timed_pieces(line, last_start, last_end))
+            else:
+                words = re.split(r"\s+", line)
+                for w in words:
+                    norm = normalize_word(w)
+                    yield (w, norm, last_start, last_end)
 
-                    if options.get("skip_existing") and os.path.exists(dest_file):
-                        pass
-                    else:
-                        clip_start = start_seconds - options["before"]
-                        if clip_start < 0:
-                            clip_start = 0.0
-                        clip_duration = (
-                            end_seconds
-                            - start_seconds
-                            + options["before"]
-                            + options["after"]
-                        )
 
-                        cmd = [
-                            "ffmpeg",
-                            "-hide_banner",
-                            "-loglevel",
-                            "error",
-                            "-y",
-                            "-ss",
-                            f"{clip_start}",
-                            "-t",
-                            f"{clip_duration}",
-                            "-i",
-                            audio_file,
-                            dest_file,
-                        ]
-                        subprocess.run(cmd, check=False)
+def read_transcript(transcript_path: str) -> List[Tuple[str, str, str, str]]:
+    """
+    Parse WebVTT transcript into a list of (orig, normalized, start, end).
+    """
+    return list(iter_transcript(transcript_path))
 
-                if options.get("limit") is not None and matches_found == int(
-                    options["limit"]
-                ):
-                    return
 
-                if options.get(
-                    "limit_per_episode"
-                ) is not None and matches_in_episode == int(
-                    options["limit_per_episode"]
-                ):
-                    break  # move to next transcript_file
+# ---------------------------------------------------------------------------
+# Transcript cache
+# ---------------------------------------------------------------------------
+
+TRANSCRIPT_CACHE_DIRNAME = "transcripts"
+TRANSCRIPT_CACHE_MAGIC = b"DSTC"
+TRANSCRIPT_CACHE_VERSION = 1
+
+# magic, version, byte order, source size, source mtime, then the number of
+# words, cues and vocabulary entries and the byte lengths of the three
+# string blobs (original tokens, vocabulary, cue timestamps).
+TRANSCRIPT_CACHE_HEADER = struct.Struct("<4sIcxxxQdIIIIII")
+
+
+def _pad8(n: int) -> int:
+    return (n + 7) & ~7
+
+
+class CompactTranscript:
+    """
+    Array-backed form of a parsed transcript.
+
+    Normalized words are interned into a vocabulary and stored as an array of
+    word ids; each word also points at its cue, whose start/end are kept both
+    as the original timestamp strings and as precomputed seconds. Original
+    tokens live in one UTF-8 blob addressed by offsets.
+    """
+
+    def __init__(
+        self,
+        vocabulary: List[str],
+        word_ids: Sequence[int],
+        cue_ids: Sequence[int],
+        cue_starts: Sequence[float],
+        cue_ends: Sequence[float],
+        cue_timestamps: List[str],
+        token_offsets: Sequence[int],
+        tokens: Union[bytes, memoryview],
+    ) -> None:
+        self.vocabulary = vocabulary
+        self.word_ids = word_ids
+        self.cue_ids = cue_ids
+        self.cue_starts = cue_starts
+        self.cue_ends = cue_ends
+        self.cue_timestamps = cue_timestamps
+        self.token_offsets = token_offsets
+        self.tokens = tokens
+        self._word_index: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.word_ids)
+
+    @classmethod
+    def from_words(
+        cls, parsed: Iterable[Tuple[str, str, str, str]]
+    ) -> "CompactTranscript":
+        """
+        Pack the words yielded by iter_transcript().
+        """
+        vocabulary: List[str] = []
+        word_index: Dict[str, int] = {}
+        word_ids = array("I")
+        cue_ids = array("I")
+        cue_starts = array("d")
+        cue_ends = array("d")
+        cue_timestamps: List[str] = []
+        token_offsets = array("I", [0])
+        tokens = bytearray()
+
+        last_cue: Optional[Tuple[str, str]] = None
+
+        for orig_word, norm_word, w_start, w_end in parsed:
+            word_id = word_index.get(norm_word)
+            if word_id is None:
+                word_id = word_index[norm_word] = len(vocabulary)
+                vocabulary.append(norm_word)
+            word_ids.append(word_id)
+
+            if (w_start, w_end) != last_cue:
+                last_cue = (w_start, w_end)
+                cue_starts.append(timestamp_to_seconds(w_start))
+                cue_ends.append(timestamp_to_seconds(w_end))
+                cue_timestamps.extend(last_cue)
+            cue_ids.append(len(cue_starts) - 1)
+
+            tokens += orig_word.encode("utf-8")
+            token_offsets.append(len(tokens))
+
+        transcript = cls(
+            vocabulary,
+            word_ids,
+            cue_ids,
+            cue_starts,
+            cue_ends,
+            cue_timestamps,
+            token_offsets,
+            bytes(tokens),
+        )
+        transcript._word_index = word_index
+        return transcript
+
+    def word_id(self, norm_word: str) -> Optional[int]:
+        if self._word_index is None:
+            self._word_index = {w: i for i, w in enumerate(self.vocabulary)}
+        return self._word_index.get(norm_word)
+
+    def norm(self, idx: int) -> str:
+        return self.vocabulary[self.word_ids[idx]]
+
+    def orig(self, idx: int) -> str:
+        return str(
+            self.tokens[self.token_offsets[idx] : self.token_offsets[idx + 1]], "utf-8"
+        )
+
+    def start(self, idx: int) -> str:
+        return self.cue_timestamps[2 * self.cue_ids[idx]]
+
+    def end(self, idx: int) -> str:
+        return self.cue_timestamps[2 * self.cue_ids[idx] + 1]
+
+    def start_seconds(self, idx: int) -> float:
+        return self.cue_starts[self.cue_ids[idx]]
+
+    def end_seconds(self, idx: int) -> float:
+        return self.cue_ends[self.cue_ids[idx]]
+
+    def write(self, cache_file: Union[str, Path], stat: TranscriptStat) -> None:
+        """
+        Write the binary cache file for a transcript whose stat() is given.
+        """
+        vocab_blob, vocab_offsets = _pack_strings(self.vocabulary)
+        cue_blob, cue_offsets = _pack_strings(self.cue_timestamps)
+
+        sections = [
+            array("d", self.cue_starts).tobytes(),
+            array("d", self.cue_ends).tobytes(),
+            array("I", self.word_ids).tobytes(),
+            array("I", self.cue_ids).tobytes(),
+            array("I", self.token_offsets).tobytes(),
+            vocab_offsets.tobytes(),
+            cue_offsets.tobytes(),
+            bytes(self.tokens),
+            vocab_blob,
+            cue_blob,
+        ]
+
+        header = TRANSCRIPT_CACHE_HEADER.pack(
+            TRANSCRIPT_CACHE_MAGIC,
+            TRANSCRIPT_CACHE_VERSION,
+            b"<" if sys.byteorder == "little" else b">",
+            stat.st_size,
+            stat.st_mtime,
+            len(self.word_ids),
+            len(self.cue_starts),
+            len(self.vocabulary),
+            len(self.tokens),
+            len(vocab_blob),
+            len(cue_blob),
+        )
+
+        cache_file = Path(cache_file)
+        tmp_file = cache_file.with_name(
+            f"{cache_file.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        with open(tmp_file, "wb") as f:
+            f.write(header)
+            f.write(b"\0" * (_pad8(len(header)) - len(header)))
+            for section in sections:
+                f.write(section)
+                f.write(b"\0" * (_pad8(len(section)) - len(section)))
+        os.replace(tmp_file, cache_file)
+
+    @classmethod
+    def open(
+        cls, cache_file: Union[str, Path], stat: TranscriptStat, mapped: bool = True
+    ) -> Optional["CompactTranscript"]:
+        """
+        Memory-map a cache file (or read it, if mapped is False), or return
+        None if it is missing or was not written for a transcript with this
+        stat(). Every mapping holds a file descriptor of its own, so
+        transcripts that are kept for long should be read.
+        """
+        try:
+            with open(cache_file, "rb") as f:
+                if mapped:
+                    data: Union[bytes, mmap.mmap] = mmap.mmap(
+                        f.fileno(), 0, access=mmap.ACCESS_READ
+                    )
+                else:
+                    data = f.read()
+        except (OSError, ValueError):
+            return None
+
+        if len(data) < TRANSCRIPT_CACHE_HEADER.size:
+            return None
+
+        (
+            magic,
+            version,
+            byte_order,
+            size,
+            mtime,
+            num_words,
+            num_cues,
+            num_vocab,
+            token_bytes,
+            vocab_bytes,
+            cue_bytes,
+        ) = TRANSCRIPT_CACHE_HEADER.unpack_from(data)
+
+        if (
+            magic != TRANSCRIPT_CACHE_MAGIC
+            or version != TRANSCRIPT_CACHE_VERSION
+            or byte_order != (b"<" if sys.byteorder == "little" else b">")
+            or size != stat.st_size
+            or mtime != stat.st_mtime
+        ):
+            return None
+
+        view = memoryview(data)
+        pos = _pad8(TRANSCRIPT_CACHE_HEADER.size)
+
+        def take(length: int, fmt: str = "B") -> memoryview:
+            nonlocal pos
+            section = view[pos : pos + length]
+            pos = _pad8(pos + length)
+            return section.cast(fmt) if fmt != "B" else section
+
+        cue_starts = take(8 * num_cues, "d")
+        cue_ends = take(8 * num_cues, "d")
+        word_ids = take(4 * num_words, "I")
+        cue_ids = take(4 * num_words, "I")
+        token_offsets = take(4 * (num_words + 1), "I")
+        vocab_offsets = take(4 * (num_vocab + 1), "I")
+        cue_offsets = take(4 * (2 * num_cues + 1), "I")
+        tokens = take(token_bytes)
+        vocab_blob = take(vocab_bytes)
+        cue_blob = take(cue_bytes)
+
+        return cls(
+            _unpack_strings(vocab_blob, vocab_offsets),
+            word_ids,
+            cue_ids,
+            cue_starts,
+            cue_ends,
+            _unpack_strings(cue_blob, cue_offsets),
+            token_offsets,
+            tokens,
+        )
+
+
+def _pack_strings(strings: List[str]) -> Tuple[bytes, array]:
+    blob = bytearray()
+    offsets = array("I", [0])
+    for string in strings:
+        blob += string.encode("utf-8")
+        offsets.append(len(blob))
+    return bytes(blob), offsets
+
+
+def _unpack_strings(blob: memoryview, offsets: Sequence[int]) -> List[str]:
+    data = bytes(blob)
+    return [
+        data[offsets[i] : offsets[i + 1]].decode("utf-8")
+        for i in range(len(offsets) - 1)
+    ]
+
+
+def transcript_cache_file(cache_dir: Union[str, Path], transcript_file: str) -> Path:
+    digest = hashlib.sha1(transcript_file.encode("utf-8")).hexdigest()
+    return Path(cache_dir) / TRANSCRIPT_CACHE_DIRNAME / f"{digest}.bin"
+
+
+def _parse_transcript(transcript_file: str, stat: TranscriptStat) -> CompactTranscript:
+    transcript = CompactTranscript.from_words(iter_transcript(transcript_file))
+    stats.count("transcripts_parsed")
+    stats.count("bytes_parsed", stat.st_size)
+    stats.count("words_parsed", len(transcript))
+    return transcript
+
+
+def load_transcript(
+    transcript_file: str,
+    cache_dir: Optional[Union[str, Path]] = None,
+    mapped: bool = True,
+) -> CompactTranscript:
+    """
+    Load a transcript in compact form, from its cache file in cache_dir when
+    that is up to date, otherwise by parsing it (and writing the cache file).
+    The cache file is memory-mapped unless mapped is False.
+    """
+    stat = transcript_stat(transcript_file)
+
+    if cache_dir is None:
+        return _parse_transcript(transcript_file, stat)
+
+    cache_file = transcript_cache_file(cache_dir, transcript_file)
+
+    transcript = CompactTranscript.open(cache_file, stat, mapped)
+    if transcript is not None:
+        stats.count("transcript_cache_hits")
+        stats.count("words_loaded", len(transcript))
+        return transcript
+
+    transcript = _parse_transcript(transcript_file, stat)
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        transcript.write(cache_file, stat)
+    except OSError as e:
+        print(f"Could not write transcript cache {cache_file}: {e}", file=sys.stderr)
+    return transcript
+
+
+# ---------------------------------------------------------------------------
+# Matching
+# ---------------------------------------------------------------------------
+
+
+# --fuzzy only allows edits to keywords at least this long; shorter ones
+# match by sound alone.
+FUZZY_MIN_LENGTH = 4
+
+
+class Keyword:
+    """
+    One space-separated word of a search term, normalized once so it can be
+    compared against many words. matches() gives the same answer as the PHP
+    matches_search_term() for the original keyword.
+
+    With fuzzy_distance (--fuzzy), a keyword without wildcards also matches
+    words with the same sound_key(), or within fuzzy_distance edits.
+    """
+
+    __slots__ = ("normalized", "parts", "fuzzy_distance", "sound", "_fuzzy_matches")
+
+    def __init__(self, keyword: str, fuzzy_distance: Optional[int] = None) -> None:
+        self.normalized = re.sub(r"[^a-z0-9*#]", "", keyword.lower())
+        self.parts = self.normalized.split("*") if "*" in self.normalized else None
+
+        if self.parts is not None or not self.normalized:
+            fuzzy_distance = None
+        self.fuzzy_distance = fuzzy_distance
+        self.sound = sound_key(self.normalized) if fuzzy_distance is not None else ""
+        self._fuzzy_matches: Dict[str, bool] = {}
+
+    def matches_any_word(self) -> bool:
+        return self.normalized == "*"
+
+    def matches_fuzzy(self, word: str) -> bool:
+        # Each distinct word is only compared once.
+        matched = self._fuzzy_matches.get(word)
+        if matched is None:
+            matched = bool(self.sound) and sound_key(word) == self.sound
+            if (
+                not matched
+                and self.fuzzy_distance
+                and len(self.normalized) >= FUZZY_MIN_LENGTH
+            ):
+                matched = within_edit_distance(
+                    self.normalized, word, self.fuzzy_distance
+                )
+            self._fuzzy_matches[word] = matched
+        return matched
+
+    def matches(self, word: str) -> bool:
+        if word == self.normalized:
+            return True
+
+        if self.fuzzy_distance is not None:
+            return self.matches_fuzzy(word)
+
+        if self.normalized == "*":
+            return True
+
+        if self.normalized == "." and len(word) == 1:
+            return True
+
+        if self.parts is not None:
+            last_match_end = 0
+
+            for idx, part in enumerate(self.parts):
+                match_location = word.find(part, last_match_end)
+                if match_location == -1:
+                    return False
+                elif idx == 0 and match_location > 0:
+                    return False
+                else:
+                    last_match_end = match_location + len(part)
+
+            if last_match_end == len(word) or self.parts[-1] == "":
+                return True
+
+        return False
+
+
+class SearchTerm:
+    """
+    A --search value: its lowercased text and compiled keywords.
+    """
+
+    def __init__(self, raw_search: str, fuzzy_distance: Optional[int] = None) -> None:
+        self.raw = raw_search
+        self.text = raw_search.lower()
+        self.keywords = [
+            Keyword(keyword, fuzzy_distance) for keyword in self.text.split(" ")
+        ]
+
+
+# Span lists are sorted (first word, last word) pairs of word positions.
+Span = Tuple[int, int]
+
+QUERY_TOKEN_RE = re.compile(r'\(|\)|"[^"]*"|[^\s()"]+')
+QUERY_PROXIMITY_RE = re.compile(r"^(O?NEAR)/([0-9]+)$")
+QUERY_DEFAULT_WINDOW = 10
+
+
+def _merge_spans(spans: List[Span]) -> List[Span]:
+    """
+    Coalesce sorted spans that overlap or touch into one span covering them.
+    """
+    merged: List[Span] = []
+    for start, end in spans:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _spans_near(
+    left: List[Span], right: List[Span], distance: int, ordered: bool
+) -> List[Span]:
+    """
+    The spans covering a left span and a right span with at most distance
+    words between them (left first, if ordered). The two may not overlap.
+
+    Every such pair gives a span, so where the operands occur many times the
+    spans overlapping or touching each other are merged into one.
+    """
+    if not left or not right:
+        return []
+
+    right_starts = [start for start, _ in right]
+    longest = max(end - start for start, end in right)
+    found = set()
+
+    for a_start, a_end in left:
+        lowest = a_end + 1 if ordered else a_start - distance - 1 - longest
+        lo = bisect.bisect_left(right_starts, lowest)
+        hi = bisect.bisect_right(right_starts, a_end + distance + 1)
+
+        for b_start, b_end in right[lo:hi]:
+            if b_start > a_end:
+                gap = b_start - a_end - 1
+            elif b_end < a_start and not ordered:
+                gap = a_start - b_end - 1
+            else:
+                continue
+            if gap <= distance:
+                found.add((min(a_start, b_start), max(a_end, b_end)))
+
+    return _merge_spans(sorted(found))
+
+
+def _spans_not_near(left: List[Span], right: List[Span], distance: int) -> List[Span]:
+    """
+    The left spans with no right span overlapping or within distance words.
+    """
+    right_starts = [start for start, _ in right]
+    longest = max((end - start for start, end in right), default=0)
+    kept = []
+
+    for a_start, a_end in left:
+        lo = bisect.bisect_left(right_starts, a_start - distance - 1 - longest)
+        hi = bisect.bisect_right(right_starts, a_end + distance + 1)
+        if not any(b_end >= a_start - distance - 1 for _, b_end in right[lo:hi]):
+            kept.append((a_start, a_end))
+
+    return kept
+
+
+class Query:
+    """
+    A --query: phrases (quoted, with the same wildcards as --search) or single
+    words combined with operators, evaluated on the word positions of each
+    phrase rather than by scanning context.
+
+        a NEAR/n b     a and b with at most n words between them, either order
+        a ONEAR/n b    the same, but a must come first
+        a AND b        a NEAR/window b (see --query_window)
+        a NOT b        a, unless b is within window words of it
+        a OR b         either
+
+    NEAR, ONEAR and NOT bind tightest, then AND, then OR; words next to each
+    other without an operator are ANDed, and parentheses group. Operators
+    must be uppercase; lowercase "and" is just a word.
+    """
+
+    def __init__(
+        self,
+        raw_query: str,
+        window: int = QUERY_DEFAULT_WINDOW,
+        fuzzy_distance: Optional[int] = None,
+    ) -> None:
+        self.raw = raw_query
+        self.text = raw_query.lower()
+        self.window = window
+        self.fuzzy_distance = fuzzy_distance
+        self.leaves: List[SearchTerm] = []
+
+        self._tokens = QUERY_TOKEN_RE.findall(raw_query)
+        self._pos = 0
+        if not self._tokens:
+            self._error("it is empty")
+        self.tree = self._parse_or()
+        if self._pos < len(self._tokens):
+            self._error(f"unexpected {self._tokens[self._pos]!r}")
+
+    def _error(self, message: str) -> None:
+        sys.exit(f"Invalid --query {self.raw!r}: {message}.\n")
+
+    def _peek(self) -> Optional[str]:
+        return self._tokens[self._pos] if self._pos < len(self._tokens) else None
+
+    def _parse_or(self) -> Tuple:
+        node = self._parse_and()
+        while self._peek() == "OR":
+            self._pos += 1
+            node = ("OR", 0, node, self._parse_and())
+        return node
+
+    def _parse_and(self) -> Tuple:
+        node = self._parse_proximity()
+        while True:
+            token = self._peek()
+            if token == "AND":
+                self._pos += 1
+            elif token is None or token in ("OR", ")"):
+                return node
+            node = ("AND", self.window, node, self._parse_proximity())
+
+    def _parse_proximity(self) -> Tuple:
+        node = self._parse_operand()
+        while True:
+            token = self._peek()
+            if token == "NOT":
+                self._pos += 1
+                node = ("NOT", self.window, node, self._parse_operand())
+                continue
+            m = QUERY_PROXIMITY_RE.match(token or "")
+            if not m:
+                return node
+            self._pos += 1
+            node = (m.group(1), int(m.group(2)), node, self._parse_operand())
+
+    def _parse_operand(self) -> Tuple:
+        token = self._peek()
+        if token is None:
+            self._error("it ends where a word or phrase was expected")
+        assert token is not None
+        self._pos += 1
+
+        if token == "(":
+            node = self._parse_or()
+            if self._peek() != ")":
+                self._error("a parenthesis is not closed")
+            self._pos += 1
+            return node
+
+        if token in ("AND", "OR", "NOT", ")") or QUERY_PROXIMITY_RE.match(token):
+            self._error(f"unexpected {token!r}")
+
+        phrase = token[1:-1] if token.startswith('"') else token
+        if not phrase.strip():
+            self._error("it has an empty phrase")
+
+        self.leaves.append(SearchTerm(phrase, self.fuzzy_distance))
+        return ("LEAF", len(self.leaves) - 1)
+
+    def evaluate(self, leaf_spans: List[List[Span]]) -> List[Span]:
+        """
+        The spans matching the whole query, given each leaf phrase's spans.
+        """
+        return self._evaluate(self.tree, leaf_spans)
+
+    def _evaluate(self, node: Tuple, leaf_spans: List[List[Span]]) -> List[Span]:
+        if node[0] == "LEAF":
+            return leaf_spans[node[1]]
+
+        op, distance, left_node, right_node = node
+        left = self._evaluate(left_node, leaf_spans)
+
+        if op != "OR" and not left:
+            return []
+
+        right = self._evaluate(right_node, leaf_spans)
+
+        if op == "OR":
+            return sorted(set(left) | set(right))
+        if op == "NOT":
+            return _spans_not_near(left, right, distance)
+        return _spans_near(left, right, distance, ordered=op == "ONEAR")
+
+
+def matching_word_ids(transcript: CompactTranscript, keyword: Keyword) -> Optional[set]:
+    """
+    The ids of the words in transcript's vocabulary that keyword matches, or
+    None if it matches every word.
+    """
+    if keyword.matches_any_word():
+        return None
+    if keyword.parts is None and keyword.fuzzy_distance is None:
+        word_id = transcript.word_id(keyword.normalized)
+        return set() if word_id is None else {word_id}
+    return {i for i, word in enumerate(transcript.vocabulary) if keyword.matches(word)}
+
+
+class TermMatcher:
+    """
+    Every --search term and --query phrase compiled together, so a
+    transcript's words can be checked against all of them in a single pass.
+    """
+
+    def __init__(
+        self,
+        raw_searches: List[str],
+        raw_queries: Sequence[str] = (),
+        query_window: int = QUERY_DEFAULT_WINDOW,
+        fuzzy_distance: Optional[int] = None,
+    ) -> None:
+        self.terms = [
+            SearchTerm(raw_search, fuzzy_distance) for raw_search in raw_searches
+        ]
+        self.queries = [
+            Query(raw_query, query_window, fuzzy_distance) for raw_query in raw_queries
+        ]
+        self.query_leaves = [leaf for query in self.queries for leaf in query.leaves]
+        self.phrases = self.terms + self.query_leaves
+
+    @classmethod
+    def from_options(cls, options: Dict[str, Any]) -> "TermMatcher":
+        return cls(
+            options["search"],
+            options.get("query", []),
+            options.get("query_window", QUERY_DEFAULT_WINDOW),
+            options.get("fuzzy_distance") if is_flag_set(options, "fuzzy") else None,
+        )
+
+    def candidates(self, transcript: CompactTranscript) -> List[List[int]]:
+        """
+        For each phrase (the terms, then the queries' leaves), the positions
+        in transcript (ascending) at which all of its keywords match
+        consecutively.
+        """
+        # Keywords shared between phrases are only resolved once.
+        keyword_ids: Dict[str, Optional[set]] = {}
+        for term in self.phrases:
+            for keyword in term.keywords:
+                if keyword.normalized not in keyword_ids:
+                    keyword_ids[keyword.normalized] = matching_word_ids(
+                        transcript, keyword
+                    )
+
+        # Terms to check, keyed by the id of a word their first keyword matches.
+        by_first_word: Dict[int, List[int]] = {}
+        # Terms whose first keyword matches every word.
+        at_every_word: List[int] = []
+        rest_ids: List[List[Optional[set]]] = []
+
+        for t, term in enumerate(self.phrases):
+            first_ids = keyword_ids[term.keywords[0].normalized]
+            if first_ids is None:
+                at_every_word.append(t)
+            else:
+                for word_id in first_ids:
+                    by_first_word.setdefault(word_id, []).append(t)
+            rest_ids.append([keyword_ids[k.normalized] for k in term.keywords[1:]])
+
+        results: List[List[int]] = [[] for _ in self.phrases]
+        word_ids = transcript.word_ids
+        num_words = len(word_ids)
+
+        if at_every_word:
+            positions: Iterable[int] = range(num_words)
+        else:
+            positions = [i for i, w in enumerate(word_ids) if w in by_first_word]
+
+        first_keyword_hits = 0
+
+        for idx in positions:
+            for t in by_first_word.get(word_ids[idx], []) + at_every_word:
+                first_keyword_hits += 1
+                rest = rest_ids[t]
+                if idx + len(rest) >= num_words:
+                    continue
+                if all(
+                    ids is None or word_ids[idx + k] in ids
+                    for k, ids in enumerate(rest, 1)
+                ):
+                    results[t].append(idx)
+
+        if stats.enabled:
+            stats.count("first_keyword_hits", first_keyword_hits)
+            stats.count("phrase_candidates", sum(len(r) for r in results))
+
+        return results
+
+    def spans(
+        self, positions: List[List[int]]
+    ) -> List[Tuple[Union[SearchTerm, Query], List[Span]]]:
+        """
+        Each term's and then each query's matching spans, from the positions
+        of every phrase as returned by candidates().
+        """
+        phrase_spans = [
+            [(p, p + len(term.keywords) - 1) for p in term_positions]
+            for term, term_positions in zip(self.phrases, positions)
+        ]
+
+        results: List[Tuple[Union[SearchTerm, Query], List[Span]]] = list(
+            zip(self.terms, phrase_spans)
+        )
+        offset = len(self.terms)
+        for query in self.queries:
+            leaf_spans = phrase_spans[offset : offset + len(query.leaves)]
+            offset += len(query.leaves)
+            results.append((query, query.evaluate(leaf_spans)))
+
+        return results
+
+
+class Match(NamedTuple):
+    search_term: str
+    start: str
+    end: str
+    start_seconds: float
+    end_seconds: float
+    context: str
+    # The transcript's own words that matched, as written.
+    matched: str
+    # Where matched starts in context.
+    match_offset: int
+
+
+class ContextFilter:
+    """
+    --context, --icontext, --context_exclude and --icontext_exclude, with the
+    case-insensitive strings lowercased once up front.
+
+    Each filter checks for its strings in the window of words around a
+    candidate joined by single spaces, as built by make_match().
+    """
+
+    def __init__(self, options: Dict[str, Any]) -> None:
+        self.context: List[str] = options["context"]
+        self.icontext = [ctx.lower() for ctx in options["icontext"]]
+        self.context_exclude: List[str] = options["context_exclude"]
+        self.icontext_exclude = [ex.lower() for ex in options["icontext_exclude"]]
+        self.active = bool(
+            self.context
+            or self.icontext
+            or self.context_exclude
+            or self.icontext_exclude
+        )
+
+    def rejects(self, text: str) -> Optional[str]:
+        """
+        The name of the first filter that rejects text, or None.
+        """
+        # context_exclude (case-sensitive)
+        if any(ex in text for ex in self.context_exclude):
+            return "context_exclude"
+
+        lower_text = text.lower() if self.icontext or self.icontext_exclude else ""
+
+        # icontext_exclude (case-insensitive)
+        if any(ex in lower_text for ex in self.icontext_exclude):
+            return "icontext_exclude"
+
+        # context (case-sensitive required)
+        if not all(ctx in text for ctx in self.context):
+            return "context"
+
+        # icontext (case-insensitive required)
+        if not all(ctx in lower_text for ctx in self.icontext):
+            return "icontext"
+
+        return None
+
+
+class ContextText:
+    """
+    A whole transcript joined the way make_match() joins a window of it, so
+    each context filter string is found once per transcript and a candidate's
+    window is checked with a binary search instead of by building and
+    lowercasing its string.
+    """
+
+    def __init__(self, transcript: CompactTranscript) -> None:
+        words = [transcript.orig(i) for i in range(len(transcript))]
+
+        # make_match() leaves a trailing space when there are no suffix
+        # words, which only happens at the end of the transcript.
+        self.text = " ".join(words) + " "
+        self.offsets = self._offsets(words)
+
+        self._words = words
+        self._lower: Optional[Tuple[str, List[int]]] = None
+        self._occurrences: Dict[Tuple[bool, str], List[int]] = {}
+
+    @staticmethod
+    def _offsets(words: List[str]) -> List[int]:
+        # Where each word starts, plus the end of the text.
+        offsets = [0] * (len(words) + 1)
+        pos = 0
+        for i, word in enumerate(words):
+            offsets[i] = pos
+            pos += len(word) + 1
+        offsets[len(words)] = pos
+        return offsets
+
+    def _text(self, lower: bool) -> Tuple[str, List[int]]:
+        if not lower:
+            return self.text, self.offsets
+        if self._lower is None:
+            # Lowercased word by word, since that can change their lengths.
+            words = [word.lower() for word in self._words]
+            self._lower = (" ".join(words) + " ", self._offsets(words))
+        return self._lower
+
+    def _contains(
+        self, needle: str, lower: bool, first: int, idx: int, end: int
+    ) -> bool:
+        if not needle:
+            return True
+
+        text, offsets = self._text(lower)
+
+        key = (lower, needle)
+        starts = self._occurrences.get(key)
+        if starts is None:
+            starts = []
+            pos = text.find(needle)
+            while pos != -1:
+                starts.append(pos)
+                pos = text.find(needle, pos + 1)
+            self._occurrences[key] = starts
+
+        window_start = offsets[first]
+        window_end = offsets[end] - (0 if end == idx + 1 else 1)
+
+        k = bisect.bisect_left(starts, window_start)
+        return k < len(starts) and starts[k] + len(needle) <= window_end
+
+    def rejects(
+        self, context_filter: ContextFilter, first: int, idx: int, end: int
+    ) -> Optional[str]:
+        """
+        ContextFilter.rejects() for the window of words [first, end) around
+        the candidate at idx.
+        """
+        if any(
+            self._contains(ex, False, first, idx, end)
+            for ex in context_filter.context_exclude
+        ):
+            return "context_exclude"
+        if any(
+            self._contains(ex, True, first, idx, end)
+            for ex in context_filter.icontext_exclude
+        ):
+            return "icontext_exclude"
+        if not all(
+            self._contains(ctx, False, first, idx, end)
+            for ctx in context_filter.context
+        ):
+            return "context"
+        if not all(
+            self._contains(ctx, True, first, idx, end)
+            for ctx in context_filter.icontext
+        ):
+            return "icontext"
+        return None
+
+
+def make_match(
+    term: Union[SearchTerm, Query],
+    prefix_words: List[str],
+    suffix_words: List[str],
+    num_matched: int,
+    start: str,
+    end: str,
+    start_seconds: float,
+    end_seconds: float,
+    options: Dict[str, Any],
+    context_filter: Optional[ContextFilter] = None,
+) -> Optional[Match]:
+    """
+    Build the match for a candidate from the words around it, or return None
+    if it is rejected by context_filter or --min_duration. The matched words
+    are the last prefix word and the first num_matched - 1 suffix words.
+    """
+    suffix_string = " ".join(suffix_words)
+    exclusion_search_string = " ".join(prefix_words) + " " + suffix_string.strip()
+
+    if context_filter is not None and context_filter.active:
+        rejected = context_filter.rejects(exclusion_search_string)
+        if rejected is not None:
+            stats.count(f"rejected_by_{rejected}")
+            return None
+
+    if options.get("min_duration") is not None:
+        if end_seconds - start_seconds < float(options["min_duration"]):
+            stats.count("rejected_by_min_duration")
+            return None
+
+    stats.count("matches_accepted")
+    return Match(
+        term.text,
+        start,
+        end,
+        start_seconds,
+        end_seconds,
+        exclusion_search_string,
+        " ".join(prefix_words[-1:] + suffix_words[: num_matched - 1]),
+        len(exclusion_search_string)
+        - len(suffix_string.strip())
+        - 1
+        - len(prefix_words[-1]),
+    )
+
+
+def limit_per_episode(
+    matches_by_term: Iterable[Iterable[Match]], options: Dict[str, Any]
+) -> Iterator[Match]:
+    """
+    Yield each term's matches in turn, applying --limit_per_episode.
+    """
+    matches_in_episode = 0
+
+    for term_matches in matches_by_term:
+        for match in term_matches:
+            matches_in_episode += 1
+
+            yield match
+
+            if options.get(
+                "limit_per_episode"
+            ) is not None and matches_in_episode == int(options["limit_per_episode"]):
+                break  # move to the next search term
+
+
+def episode_matches(
+    transcript: CompactTranscript,
+    matcher: TermMatcher,
+    positions: List[List[int]],
+    options: Dict[str, Any],
+) -> Iterator[Match]:
+    """
+    Turn each phrase's candidate positions into matches, term by term and then
+    query by query, applying the context filters, --min_duration and
+    --limit_per_episode.
+    """
+    num_words = len(transcript)
+    context_filter = ContextFilter(options)
+    spans = matcher.spans(positions)
+
+    # With enough candidates, finding each filter string once in the whole
+    # transcript beats checking every candidate's window separately.
+    context_text: Optional[ContextText] = None
+    if context_filter.active:
+        window = options["prefix_words"] + 1 + options["suffix_words"]
+        if sum(len(term_spans) for _, term_spans in spans) * window >= num_words:
+            context_text = ContextText(transcript)
+
+    def term_matches(
+        term: Union[SearchTerm, Query], term_spans: List[Span]
+    ) -> Iterator[Match]:
+        for idx, last in term_spans:
+            first = max(0, idx - options["prefix_words"])
+            end = min(num_words, last + 1 + options["suffix_words"])
+
+            if context_text is not None:
+                rejected = context_text.rejects(context_filter, first, idx, end)
+                if rejected is not None:
+                    stats.count(f"rejected_by_{rejected}")
+                    continue
+
+            match = make_match(
+                term,
+                [transcript.orig(i) for i in range(first, idx + 1)],
+                [transcript.orig(i) for i in range(idx + 1, end)],
+                last - idx + 1,
+                transcript.start(idx),
+                transcript.end(last),
+                transcript.start_seconds(idx),
+                transcript.end_seconds(last),
+                options,
+                None if context_text is not None else context_filter,
+            )
+            if match is not None:
+                yield match
+
+    yield from limit_per_episode(
+        (term_matches(term, term_spans) for term, term_spans in spans), options
+    )
+
+
+def stream_matches(
+    words: Iterable[Tuple[str, str, str, str]],
+    matcher: TermMatcher,
+    options: Dict[str, Any],
+) -> Iterator[Match]:
+    """
+    Like episode_matches(), but for words streamed from iter_transcript():
+    only a ring buffer holding the prefix/suffix window around the current
+    word is kept, and context is only put together for candidates.
+    """
+    terms = matcher.terms
+    context_filter = ContextFilter(options)
+    prefix_count = options["prefix_words"]
+    lookahead = options["suffix_words"] + max(len(t.keywords) for t in terms) - 1
+    size = prefix_count + 1 + lookahead
+    ring: List[Tuple[str, str, str, str]] = [("", "", "", "")] * size
+
+    # Which terms' first keyword each distinct word matches.
+    first_matches: Dict[str, List[int]] = {}
+    results: List[List[Match]] = [[] for _ in terms]
+
+    def check(idx: int, count: int) -> None:
+        # count is the number of words read so far, so the ring holds words
+        # [count - size, count).
+        norm_word = ring[idx % size][1]
+        term_ids = first_matches.get(norm_word)
+        if term_ids is None:
+            term_ids = first_matches[norm_word] = [
+                t for t, term in enumerate(terms) if term.keywords[0].matches(norm_word)
+            ]
+
+        for t in term_ids:
+            term = terms[t]
+            last = idx + len(term.keywords) - 1
+            if stats.enabled:
+                stats.count("first_keyword_hits")
+            if last >= count:
+                continue
+            if not all(
+                keyword.matches(ring[(idx + k) % size][1])
+                for k, keyword in enumerate(term.keywords[1:], 1)
+            ):
+                continue
+            if stats.enabled:
+                stats.count("phrase_candidates")
+
+            suffix_word_count = options["suffix_words"] + len(term.keywords) - 1
+            first_entry = ring[idx % size]
+            last_entry = ring[last % size]
+
+            match = make_match(
+                term,
+                [ring[i % size][0] for i in range(max(0, idx - prefix_count), idx + 1)],
+                [
+                    ring[i % size][0]
+                    for i in range(idx + 1, min(count, idx + 1 + suffix_word_count))
+                ],
+                len(term.keywords),
+                first_entry[2],
+                last_entry[3],
+                timestamp_to_seconds(first_entry[2]),
+                timestamp_to_seconds(last_entry[3]),
+                options,
+                context_filter,
+            )
+            if match is not None:
+                results[t].append(match)
+
+    count = 0
+    for entry in words:
+        ring[count % size] = entry
+        count += 1
+        if count > lookahead:
+            check(count - 1 - lookahead, count)
+
+    for idx in range(max(0, count - lookahead), count):
+        check(idx, count)
+
+    stats.count("words_parsed", count)
+
+    yield from limit_per_episode(results, options)
+
+
+# ---------------------------------------------------------------------------
+# Scanning
+# ---------------------------------------------------------------------------
+
+# Per-process state for pool workers, set up once by _init_scan_worker().
+_scan_worker: Dict[str, Any] = {}
+
+
+def scan_transcript(
+    transcript_file: str,
+    matcher: TermMatcher,
+    options: Dict[str, Any],
+    transcript_cache_dir: Optional[Union[str, Path]],
+    index_positions: Optional[List[List[int]]] = None,
+) -> Iterator[Match]:
+    """
+    Yield the matches in one transcript, in output order. index_positions,
+    if given, are the candidate positions of each term from the word index.
+    """
+    if index_positions is None and transcript_cache_dir is None and not matcher.queries:
+        # Nothing needs random access to the transcript, so don't build it.
+        if stats.enabled:
+            stats.count("transcripts_parsed")
+            stats.count("bytes_parsed", os.path.getsize(transcript_file))
+        yield from stats.timed(
+            "parse_and_match",
+            stream_matches(iter_transcript(transcript_file), matcher, options),
+        )
+        return
+
+    with stats.timer("load"):
+        transcript = load_transcript(transcript_file, transcript_cache_dir)
+    if len(transcript) == 0:
+        return
+
+    if index_positions is not None:
+        positions = index_positions
+    else:
+        with stats.timer("match"):
+            positions = matcher.candidates(transcript)
+
+    yield from stats.timed(
+        "context_and_filters",
+        episode_matches(transcript, matcher, positions, options),
+    )
+
+
+def _init_scan_worker(
+    options: Dict[str, Any],
+    transcript_cache_dir: Optional[Union[str, Path]],
+    saved_searches: Optional[List[Tuple[str, Dict[str, Any], List[int]]]] = None,
+) -> None:
+    _scan_worker["options"] = options
+    _scan_worker["matcher"] = TermMatcher.from_options(options)
+    _scan_worker["transcript_cache_dir"] = transcript_cache_dir
+    if saved_searches is not None:
+        _scan_worker["searches"] = [
+            SavedSearch(label, search_options, phrase_indices)
+            for label, search_options, phrase_indices in saved_searches
+        ]
+
+    # A forked worker starts with a copy of the parent's stats so far.
+    stats.enabled = stats_enabled(options)
+    stats.reset()
+
+
+def _scan_in_worker(
+    transcript_file: str, index_positions: Optional[List[List[int]]]
+) -> Tuple[List[Match], Optional[Dict[str, Any]]]:
+    matches = list(
+        stats.timed(
+            "scan",
+            scan_transcript(
+                transcript_file,
+                _scan_worker["matcher"],
+                _scan_worker["options"],
+                _scan_worker["transcript_cache_dir"],
+                index_positions,
+            ),
+            transcript_file,
+        )
+    )
+    return matches, stats.take() if stats.enabled else None
+
+
+def _scan_batch_in_worker(
+    transcript_file: str, index_positions: Optional[List[List[int]]]
+) -> Tuple[List[List[Match]], Optional[Dict[str, Any]]]:
+    matches = list(
+        stats.timed(
+            "scan",
+            scan_transcript_batch(
+                transcript_file,
+                _scan_worker["matcher"],
+                _scan_worker["searches"],
+                _scan_worker["transcript_cache_dir"],
+                index_positions,
+            ),
+            transcript_file,
+        )
+    )
+    return matches, stats.take() if stats.enabled else None
+
+
+def _scan_in_pool(
+    transcripts: List[Tuple[str, Optional[List[List[int]]]]],
+    options: Dict[str, Any],
+    transcript_cache_dir: Optional[Union[str, Path]],
+    scan: Callable[..., Tuple[Any, Optional[Dict[str, Any]]]],
+    saved_searches: Optional[List[Tuple[str, Dict[str, Any], List[int]]]] = None,
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Yield (transcript file, result of scan() in a pool worker) for each
+    transcript, in order, with --jobs workers. Closing the generator cancels
+    whatever work is still outstanding.
+    """
+    executor = ProcessPoolExecutor(
+        max_workers=options["jobs"],
+        initializer=_init_scan_worker,
+        initargs=(options, transcript_cache_dir, saved_searches),
+    )
+    pending: Deque[Tuple[str, Future]] = collections.deque()
+    queued = iter(transcripts)
+
+    def submit_next() -> None:
+        for transcript_file, index_positions in queued:
+            pending.append(
+                (
+                    transcript_file,
+                    executor.submit(scan, transcript_file, index_positions),
+                )
+            )
+            return
+
+    try:
+        # Keep a few transcripts per worker in flight so none sit idle while
+        # results are consumed in order.
+        for _ in range(options["jobs"] * 4):
+            submit_next()
+
+        while pending:
+            transcript_file, future = pending.popleft()
+            submit_next()
+            result, worker_stats = future.result()
+            if worker_stats is not None:
+                stats.merge(worker_stats)
+            yield transcript_file, result
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def scan_transcripts(
+    transcripts: List[Tuple[str, Optional[List[List[int]]]]],
+    matcher: TermMatcher,
+    options: Dict[str, Any],
+    transcript_cache_dir: Optional[Union[str, Path]],
+) -> Iterator[Tuple[str, Iterable[Match]]]:
+    """
+    Yield (transcript file, matches) for each (transcript file, index
+    positions) pair, in the order given.
+
+    With --jobs > 1 the transcripts are scanned ahead in a process pool;
+    closing the generator (e.g. once --limit is reached) cancels whatever
+    work is still outstanding.
+    """
+    if options["jobs"] == 1:
+        for transcript_file, index_positions in transcripts:
+            yield transcript_file, stats.timed(
+                "scan",
+                scan_transcript(
+                    transcript_file,
+                    matcher,
+                    options,
+                    transcript_cache_dir,
+                    index_positions,
+                ),
+                transcript_file,
+            )
+        return
+
+    yield from _scan_in_pool(
+        transcripts, options, transcript_cache_dir, _scan_in_worker
+    )
+
+
+# ---------------------------------------------------------------------------
+# Saved searches
+# ---------------------------------------------------------------------------
+
+# Options a --queries_file line can set for itself.
+SAVED_SEARCH_LIST_OPTIONS = (
+    "search",
+    "query",
+    "context",
+    "icontext",
+    "context_exclude",
+    "icontext_exclude",
+)
+
+
+def build_saved_search_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="--queries_file", add_help=False)
+    for key in SAVED_SEARCH_LIST_OPTIONS:
+        parser.add_argument(f"--{key}", action="append")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--limit_per_episode", type=int)
+    parser.add_argument("--output_dir")
+    parser.add_argument("--supercut")
+    return parser
+
+
+class SavedSearch:
+    """
+    One line of a --queries_file, with the command line's options plus its
+    own, and where its phrases are among those of the matcher built for the
+    whole file (see combine_saved_searches()).
+    """
+
+    def __init__(
+        self,
+        label: str,
+        options: Dict[str, Any],
+        phrase_indices: Optional[List[int]] = None,
+    ) -> None:
+        self.label = label
+        self.options = options
+        self.matcher = TermMatcher.from_options(options)
+        self.phrase_indices = phrase_indices or []
+
+
+def read_queries_file(options: Dict[str, Any]) -> List[SavedSearch]:
+    """
+    Parse --queries_file. Each line's leading words, up to its first option,
+    are a search phrase; its context options add to the command line's and
+    its --output_dir is taken relative to the command line's.
+    """
+    path = options["queries_file"]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError as e:
+        sys.exit(f"Could not read --queries_file {path}: {e}\n")
+
+    parser = build_saved_search_parser()
+    searches: List[SavedSearch] = []
+
+    for line_number, line in enumerate(lines, 1):
+        try:
+            tokens = shlex.split(line, comments=True)
+        except ValueError as e:
+            sys.exit(f"{path}:{line_number}: {e}\n")
+        if not tokens:
+            continue
+
+        phrase_length = next(
+            (i for i, token in enumerate(tokens) if token.startswith("--")),
+            len(tokens),
+        )
+        argv = tokens[phrase_length:]
+        if phrase_length:
+            argv = ["--search", " ".join(tokens[:phrase_length])] + argv
+        try:
+            args = parser.parse_args(argv)
+        except SystemExit:
+            sys.exit(f"{path}:{line_number}: invalid search: {line}\n")
+
+        search_options = dict(options)
+        search_options["search"] = list(
+            dict.fromkeys(s for s in args.search or [] if s)
+        )
+        search_options["query"] = list(
+            dict.fromkeys(q for q in args.query or [] if q.strip())
+        )
+        if not search_options["search"] and not search_options["query"]:
+            sys.exit(f"{path}:{line_number}: no search or query: {line}\n")
+
+        for key in SAVED_SEARCH_LIST_OPTIONS[2:]:
+            search_options[key] = options[key] + (getattr(args, key) or [])
+        for key in ("limit", "limit_per_episode"):
+            if getattr(args, key) is not None:
+                search_options[key] = getattr(args, key)
+        if args.output_dir:
+            out_dir = os.path.join(
+                options["output_dir"], os.path.expanduser(args.output_dir)
+            )
+            search_options["output_dir"] = out_dir.rstrip(os.sep) + os.sep
+            Path(out_dir).mkdir(parents=True, exist_ok=True)
+        if args.supercut:
+            search_options["supercut"] = os.path.expanduser(args.supercut)
+
+        searches.append(SavedSearch(shlex.join(tokens), search_options))
+
+    if not searches:
+        sys.exit(f"No searches in --queries_file {path}.\n")
+    return searches
+
+
+def combine_saved_searches(
+    options: Dict[str, Any], searches: List[SavedSearch]
+) -> Dict[str, Any]:
+    """
+    options searching for every saved search's terms and queries, so that one
+    matcher (and one index lookup) finds the candidates of all of them, and
+    each search's phrase_indices into that matcher's phrases.
+    """
+    term_offset = 0
+    leaf_offset = sum(len(search.matcher.terms) for search in searches)
+    for search in searches:
+        num_terms = len(search.matcher.terms)
+        num_leaves = len(search.matcher.query_leaves)
+        search.phrase_indices = list(
+            range(term_offset, term_offset + num_terms)
+        ) + list(range(leaf_offset, leaf_offset + num_leaves))
+        term_offset += num_terms
+        leaf_offset += num_leaves
+
+    return dict(
+        options,
+        search=[term for search in searches for term in search.options["search"]],
+        query=[query for search in searches for query in search.options["query"]],
+    )
+
+
+def scan_transcript_batch(
+    transcript_file: str,
+    matcher: TermMatcher,
+    searches: List[SavedSearch],
+    transcript_cache_dir: Optional[Union[str, Path]],
+    index_positions: Optional[List[List[int]]] = None,
+) -> Iterator[List[Match]]:
+    """
+    Yield the matches of each saved search in one transcript, which is loaded
+    once and checked against the phrases of all of them (matcher) at once.
+    """
+    with stats.timer("load"):
+        transcript = load_transcript(transcript_file, transcript_cache_dir)
+
+    if len(transcript) == 0:
+        positions: List[List[int]] = [[] for _ in matcher.phrases]
+    elif index_positions is not None:
+        positions = index_positions
+    else:
+        with stats.timer("match"):
+            positions = matcher.candidates(transcript)
+
+    for search in searches:
+        yield list(
+            stats.timed(
+                "context_and_filters",
+                episode_matches(
+                    transcript,
+                    search.matcher,
+                    [positions[i] for i in search.phrase_indices],
+                    search.options,
+                ),
+            )
+        )
+
+
+def scan_batch(
+    transcripts: List[Tuple[str, Optional[List[List[int]]]]],
+    matcher: TermMatcher,
+    searches: List[SavedSearch],
+    options: Dict[str, Any],
+    transcript_cache_dir: Optional[Union[str, Path]],
+) -> Iterator[Tuple[str, List[List[Match]]]]:
+    """
+    Like scan_transcripts(), but yielding each saved search's matches.
+    """
+    if options["jobs"] == 1:
+        for transcript_file, index_positions in transcripts:
+            yield transcript_file, list(
+                stats.timed(
+                    "scan",
+                    scan_transcript_batch(
+                        transcript_file,
+                        matcher,
+                        searches,
+                        transcript_cache_dir,
+                        index_positions,
+                    ),
+                    transcript_file,
+                )
+            )
+        return
+
+    yield from _scan_in_pool(
+        transcripts,
+        options,
+        transcript_cache_dir,
+        _scan_batch_in_worker,
+        [(search.label, search.options, search.phrase_indices) for search in searches],
+    )
+
+
+def process_saved_searches(
+    results: Iterable[Tuple[str, List[List[Match]]]],
+    searches: List[SavedSearch],
+    on_match: Callable[[str, Match], None],
+    on_search: Callable[[SavedSearch], None],
+) -> None:
+    """
+    Collect each saved search's matches from the single pass over the
+    transcripts, then report (and extract) them search by search, calling
+    on_search before each one's matches. The pass ends early once every
+    search has reached its --limit.
+    """
+    found: List[List[Tuple[str, List[Match]]]] = [[] for _ in searches]
+    counts = [0] * len(searches)
+
+    for transcript_file, search_matches in results:
+        for i, matches in enumerate(search_matches):
+            if matches:
+                found[i].append((transcript_file, matches))
+                counts[i] += len(matches)
+
+        if all(
+            search.options.get("limit") is not None
+            and counts[i] >= int(search.options["limit"])
+            for i, search in enumerate(searches)
+        ):
+            break
+
+    for search, search_results in zip(searches, found):
+        on_search(search)
+        process_matches(search_results, search.options, on_match)
+
+
+# ---------------------------------------------------------------------------
+# Audio files
+# ---------------------------------------------------------------------------
+
+AUDIO_FILE_MAP_FILENAME = "audio-files.json"
+
+GUID_RE = re.compile(r"\(guid=(.+?)\)")
+
+
+class AudioFileMap:
+    """
+    Lookup from episode guid to audio file, built by listing each podcast
+    directory under episode_dir once.
+
+    Listings are kept in cache_file (if given) and reused for as long as a
+    podcast directory's mtime is unchanged.
+    """
+
+    def __init__(self, episode_dir: Path, cache_file: Optional[Path] = None) -> None:
+        self.episode_dir = episode_dir
+        self.podcast_dirs: Dict[str, Dict[str, List[str]]] = {}
+
+        cached: Dict[str, Any] = {}
+        if cache_file is not None and cache_file.is_file():
+            try:
+                with cache_file.open("r", encoding="utf-8") as f:
+                    cached = json.load(f).get(str(episode_dir), {})
+            except (OSError, ValueError):
+                cached = {}
+
+        listings: Dict[str, Any] = {}
+        changed = False
+
+        entries: List[os.DirEntry] = []
+        if episode_dir.is_dir():
+            entries = sorted(os.scandir(episode_dir), key=lambda e: e.name)
+
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+
+            mtime = entry.stat().st_mtime
+            listing = cached.get(entry.name)
+            if listing is None or listing["mtime"] != mtime:
+                listing = {"mtime": mtime, "guids": self._scan(entry.path)}
+                changed = True
+
+            listings[entry.name] = listing
+            self.podcast_dirs[entry.name] = listing["guids"]
+
+        if cache_file is not None and (changed or listings.keys() != cached.keys()):
+            self._save(cache_file, listings)
+
+    @staticmethod
+    def _scan(podcast_dir: str) -> Dict[str, List[str]]:
+        guids: Dict[str, List[str]] = {}
+        for entry in os.scandir(podcast_dir):
+            m = GUID_RE.search(entry.name)
+            if m and "." in entry.name[m.end() :] and entry.is_file():
+                guids.setdefault(m.group(1), []).append(entry.name)
+        for names in guids.values():
+            names.sort()
+        return guids
+
+    def _save(self, cache_file: Path, listings: Dict[str, Any]) -> None:
+        try:
+            with cache_file.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        data[str(self.episode_dir)] = listings
+
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+            with tmp_file.open("w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            print(f"Could not write {cache_file}: {e}", file=sys.stderr)
+
+    def find(self, guid: str, podcast_patterns: List[str]) -> List[str]:
+        """
+        The audio files for guid in podcast directories matching any of
+        podcast_patterns (case-sensitively, like the glob this replaces).
+        """
+        audio_files: List[str] = []
+        for podcast_title, guids in self.podcast_dirs.items():
+            if not any(
+                fnmatch.fnmatchcase(podcast_title, f"*{pattern}*")
+                for pattern in podcast_patterns
+            ):
+                continue
+            audio_files.extend(
+                os.path.join(self.episode_dir, podcast_title, name)
+                for name in guids.get(guid, [])
+            )
+        return audio_files
+
+
+# ---------------------------------------------------------------------------
+# Transcript manifest
+# ---------------------------------------------------------------------------
+
+MANIFEST_FILENAME = "manifest.json"
+
+
+class TranscriptManifest:
+    """
+    Every transcript under transcript_dir, with its size, mtime, guid and
+    podcast.
+
+    The manifest is kept in cache_file (if given) and refreshed
+    incrementally: a podcast directory is only relisted when its mtime
+    changes.
+    """
+
+    def __init__(self, transcript_dir: Path, cache_file: Optional[Path] = None) -> None:
+        self.transcript_dir = transcript_dir
+        self.cache_file = cache_file
+        self.podcast_dirs: Dict[str, Dict[str, Any]] = {}
+
+        if cache_file is not None and cache_file.is_file():
+            try:
+                with cache_file.open("r", encoding="utf-8") as f:
+                    self.podcast_dirs = json.load(f).get(str(transcript_dir), {})
+            except (OSError, ValueError):
+                self.podcast_dirs = {}
+
+    def refresh(self, check_files: bool = False) -> None:
+        """
+        Relist the podcast directories whose mtime changed. With check_files,
+        also stat() every transcript in the others, to notice files
+        rewritten in place (which doesn't change their directory's mtime).
+        """
+        podcast_dirs: Dict[str, Dict[str, Any]] = {}
+        changed = False
+
+        entries: List[os.DirEntry] = []
+        if self.transcript_dir.is_dir():
+            entries = sorted(os.scandir(self.transcript_dir), key=lambda e: e.name)
+
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+
+            mtime = entry.stat().st_mtime
+            listing = self.podcast_dirs.get(entry.name)
+
+            if listing is None or listing["mtime"] != mtime:
+                listing = {
+                    "mtime": mtime,
+                    "transcripts": self._scan(entry.path, listing),
+                }
+                changed = True
+            elif check_files:
+                transcripts = self._scan(entry.path, listing, listing["transcripts"])
+                if transcripts != listing["transcripts"]:
+                    listing = {"mtime": mtime, "transcripts": transcripts}
+                    changed = True
+
+            podcast_dirs[entry.name] = listing
+
+        if podcast_dirs.keys() != self.podcast_dirs.keys():
+            changed = True
+        self.podcast_dirs = podcast_dirs
+
+        if changed and self.cache_file is not None:
+            self._save(self.cache_file)
+
+    @staticmethod
+    def _scan(
+        podcast_dir: str,
+        previous: Optional[Dict[str, Any]],
+        names: Optional[Iterable[str]] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Stat the transcripts in podcast_dir (or just those named), keeping
+        the guid already known for each one.
+        """
+        known = previous["transcripts"] if previous is not None else {}
+        if names is None:
+            names = transcript_names(os.listdir(podcast_dir))
+
+        transcripts: Dict[str, Dict[str, Any]] = {}
+        for name in names:
+            try:
+                stat = transcript_stat(os.path.join(podcast_dir, name))
+            except FileNotFoundError:
+                continue
+
+            if name in known:
+                guid = known[name]["guid"]
+            else:
+                m = GUID_RE.search(name)
+                guid = m.group(1) if m else None
+
+            transcripts[name] = {
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+                "guid": guid,
+            }
+        return transcripts
+
+    def _save(self, cache_file: Path) -> None:
+        try:
+            with cache_file.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        data[str(self.transcript_dir)] = self.podcast_dirs
+
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+            with tmp_file.open("w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            print(f"Could not write {cache_file}: {e}", file=sys.stderr)
+
+    def list_podcast(self, podcast_path: Path) -> List[str]:
+        """
+        The transcripts in one podcast directory, for list_transcripts().
+        """
+        listing = self.podcast_dirs.get(podcast_path.name)
+        if listing is None:
+            return []
+        return [str(podcast_path / name) for name in listing["transcripts"]]
+
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        """
+        {transcript path: {"size", "mtime", "guid", "podcast"}} for every
+        transcript.
+        """
+        return {
+            os.path.join(str(self.transcript_dir), podcast, name): dict(
+                entry, podcast=podcast
+            )
+            for podcast, listing in self.podcast_dirs.items()
+            for name, entry in listing["transcripts"].items()
+        }
+
+
+# ---------------------------------------------------------------------------
+# Extraction
+# ---------------------------------------------------------------------------
+
+
+class Clip(NamedTuple):
+    audio_file: str
+    dest_file: str
+    start: float
+    duration: float
+    # ffmpeg output options, between the input and dest_file.
+    output_args: Tuple[str, ...] = ()
+
+
+# --output_format: the suffix of clip files (None for the audio file's own)
+# and the ffmpeg output options that produce them. aif and wav leave the codec
+# to ffmpeg's default for the suffix.
+OUTPUT_FORMATS: Dict[str, Tuple[Optional[str], Tuple[str, ...]]] = {
+    "aif": (".aif", ()),
+    "wav": (".wav", ()),
+    "mp3": (".mp3", ("-vn", "-c:a", "libmp3lame")),
+    "m4a": (".m4a", ("-vn", "-c:a", "aac")),
+    "opus": (".opus", ("-vn", "-c:a", "libopus")),
+    "copy": (None, ("-vn", "-c:a", "copy")),
+}
+OUTPUT_FORMAT_ALIASES = {"aac": "m4a", "aiff": "aif"}
+STREAM_COPY_ARGS = OUTPUT_FORMATS["copy"][1]
+
+
+def output_args(options: Dict[str, Any]) -> Tuple[str, ...]:
+    """
+    The ffmpeg output options for --output_format, --sample_rate and
+    --channels.
+    """
+    args = OUTPUT_FORMATS[options["output_format"]][1]
+    if options.get("sample_rate"):
+        args += ("-ar", str(options["sample_rate"]))
+    if options.get("channels"):
+        args += ("-ac", str(options["channels"]))
+    return args
+
+
+def merge_clips(clips: List[Clip], gap: float) -> List[Clip]:
+    """
+    Coalesce clips (all from one audio file) that overlap or are at most gap
+    seconds apart into one clip covering them, named after the earliest.
+    """
+    merged: List[Clip] = []
+    for clip in sorted(clips, key=lambda c: (c.start, -c.duration)):
+        if merged:
+            previous = merged[-1]
+            previous_end = previous.start + previous.duration
+            if clip.start - previous_end <= gap:
+                end = max(previous_end, clip.start + clip.duration)
+                merged[-1] = previous._replace(duration=end - previous.start)
+                continue
+        merged.append(clip)
+    return merged
+
+
+CLIP_CACHE_DIRNAME = "clips"
+
+
+class ClipCache:
+    """
+    Extracted clips kept under cache_dir, keyed by the audio file (path, size
+    and mtime), the clip's start and duration, and its output format and
+    ffmpeg options, so a clip extracted before is linked (or copied) into
+    place instead of being encoded again.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path]) -> None:
+        self.cache_dir = Path(cache_dir) / CLIP_CACHE_DIRNAME
+
+    def _path(self, clip: Clip) -> Optional[Path]:
+        try:
+            stat = os.stat(clip.audio_file)
+        except OSError:
+            return None
+
+        suffix = Path(clip.dest_file).suffix
+        key = json.dumps(
+            [
+                os.path.abspath(clip.audio_file),
+                stat.st_size,
+                stat.st_mtime_ns,
+                f"{clip.start:.6f}",
+                f"{clip.duration:.6f}",
+                suffix,
+                list(clip.output_args),
+            ]
+        )
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return self.cache_dir / digest[:2] / f"{digest}{suffix}"
+
+    @staticmethod
+    def _link(source: Union[str, Path], dest: Union[str, Path]) -> None:
+        # Replace dest atomically, with a hard link if possible.
+        dest = Path(dest)
+        tmp_file = dest.with_name(
+            f".{dest.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        try:
+            os.link(source, tmp_file)
+        except OSError:
+            shutil.copyfile(source, tmp_file)
+        os.replace(tmp_file, dest)
+
+    def fetch(self, clip: Clip) -> bool:
+        """
+        Put the cached copy of clip at its destination, if there is one.
+        """
+        cache_file = self._path(clip)
+        if cache_file is None or not cache_file.is_file():
+            return False
+        try:
+            self._link(cache_file, clip.dest_file)
+        except OSError:
+            return False
+        stats.count("clip_cache_hits")
+        return True
+
+    def store(self, clip: Clip) -> None:
+        cache_file = self._path(clip)
+        if cache_file is None:
+            return
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            self._link(clip.dest_file, cache_file)
+        except OSError as e:
+            print(f"Could not cache {clip.dest_file}: {e}", file=sys.stderr)
+
+
+PCM_CACHE_DIRNAME = "pcm"
+PCM_CACHE_DEFAULT_SIZE_MB = 4096
+
+# What ffmpeg writes for these suffixes by default: 16-bit PCM at the source's
+# sample rate, so clips cut from the decoded episode come out the same.
+PCM_CLIP_SUFFIXES = (".aif", ".wav")
+
+
+def _extended_float(value: float) -> bytes:
+    """
+    value as an 80-bit IEEE 754 extended precision float, which is how AIFF
+    stores the sample rate.
+    """
+    mantissa, exponent = math.frexp(value)
+    return struct.pack(">HQ", exponent + 16382, int(mantissa * (1 << 64)))
+
+
+def write_aiff(path: str, data: bytes, channels: int, sample_rate: int) -> None:
+    """
+    Write little-endian 16-bit PCM frames as an AIFF file.
+    """
+    samples = array("h")
+    samples.frombytes(data)
+    if sys.byteorder == "little":
+        samples.byteswap()
+
+    comm = struct.pack(">hIh", channels, len(data) // (2 * channels), 16)
+    comm += _extended_float(sample_rate)
+    ssnd_size = 8 + len(data)
+
+    with open(path, "wb") as f:
+        f.write(b"FORM" + struct.pack(">I", 4 + 8 + len(comm) + 8 + ssnd_size))
+        f.write(b"AIFF")
+        f.write(b"COMM" + struct.pack(">I", len(comm)) + comm)
+        f.write(b"SSND" + struct.pack(">III", ssnd_size, 0, 0))
+        f.write(samples.tobytes())
+
+
+def write_wav(path: str, data: bytes, channels: int, sample_rate: int) -> None:
+    """
+    Write little-endian 16-bit PCM frames as a WAV file.
+    """
+    with wave.open(path, "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(data)
+
+
+class PcmAudio:
+    """
+    A decoded episode: a 16-bit PCM WAV file, memory-mapped so that clips are
+    cut from it without reading the rest.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            if self.mm[:4] != b"RIFF" or self.mm[8:12] != b"WAVE":
+                raise ValueError(f"{path} is not a WAV file")
+
+            fmt: Optional[Tuple[int, ...]] = None
+            pos = 12
+            while pos + 8 <= len(self.mm):
+                chunk_id, size = struct.unpack_from("<4sI", self.mm, pos)
+                pos += 8
+                if chunk_id == b"fmt ":
+                    fmt = struct.unpack_from("<HHIIHH", self.mm, pos)
+                elif chunk_id == b"data":
+                    break
+                pos += size + (size & 1)
+            else:
+                raise ValueError(f"{path} has no audio data")
+
+            # PCM or WAVE_FORMAT_EXTENSIBLE (used for more than two channels).
+            if fmt is None or fmt[0] not in (1, 0xFFFE) or fmt[5] != 16:
+                raise ValueError(f"{path} is not 16-bit PCM")
+        except (ValueError, struct.error):
+            self.mm.close()
+            raise
+
+        self.channels = fmt[1]
+        self.sample_rate = fmt[2]
+        self.frame_size = 2 * self.channels
+        self.data_start = pos
+        self.num_frames = min(size, len(self.mm) - pos) // self.frame_size
+
+    def __enter__(self) -> "PcmAudio":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.mm.close()
+
+    def write_clip(self, clip: Clip) -> None:
+        """
+        Write the part of the episode clip covers to clip.dest_file, as AIFF
+        or WAV according to its suffix.
+        """
+        first = min(int(round(clip.start * self.sample_rate)), self.num_frames)
+        last = min(
+            first + int(round(clip.duration * self.sample_rate)), self.num_frames
+        )
+        data = self.mm[
+            self.data_start
+            + first * self.frame_size : self.data_start
+            + last * self.frame_size
+        ]
+
+        writer = write_wav if clip.dest_file.endswith(".wav") else write_aiff
+        writer(clip.dest_file, data, self.channels, self.sample_rate)
+        stats.count("clips_cut_from_pcm")
+
+
+class PcmCache:
+    """
+    Episodes decoded to PCM once, kept under cache_dir keyed by the audio file
+    (path, size and mtime) and the -ar/-ac options, so every later clip from
+    the same episode is cut from memory-mapped samples instead of ffmpeg
+    decoding up to it again. The least recently used files are deleted once
+    there are more than max_bytes of them.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path], max_bytes: int) -> None:
+        self.cache_dir = Path(cache_dir) / PCM_CACHE_DIRNAME
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.file_locks: Dict[Path, threading.Lock] = {}
+
+    def _path(self, audio_file: str, output_args: Tuple[str, ...]) -> Optional[Path]:
+        try:
+            stat = os.stat(audio_file)
+        except OSError:
+            return None
+
+        key = json.dumps(
+            [
+                os.path.abspath(audio_file),
+                stat.st_size,
+                stat.st_mtime_ns,
+                list(output_args),
+            ]
+        )
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{digest}.wav"
+
+    def open(self, audio_file: str, output_args: Tuple[str, ...]) -> Optional[PcmAudio]:
+        """
+        The decoded audio of audio_file, decoding it first if it isn't cached,
+        or None if it can't be decoded.
+        """
+        pcm_file = self._path(audio_file, output_args)
+        if pcm_file is None:
+            return None
+
+        with self.lock:
+            file_lock = self.file_locks.setdefault(pcm_file, threading.Lock())
+
+        with file_lock:
+            if pcm_file.is_file():
+                stats.count("pcm_cache_hits")
+                # The mtime is what eviction goes by.
+                with contextlib.suppress(OSError):
+                    os.utime(pcm_file)
+            elif self._decode(audio_file, output_args, pcm_file):
+                self._evict(pcm_file)
+            else:
+                return None
+
+            try:
+                return PcmAudio(pcm_file)
+            except (OSError, ValueError) as e:
+                print(f"Could not read {pcm_file}: {e}", file=sys.stderr)
+                return None
+
+    def _decode(
+        self, audio_file: str, output_args: Tuple[str, ...], pcm_file: Path
+    ) -> bool:
+        stats.count("pcm_decodes")
+        tmp_file = pcm_file.with_name(
+            f".{pcm_file.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        cmd = [
+            "ffmpeg",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-y",
+            "-i",
+            audio_file,
+            "-vn",
+            *output_args,
+            "-c:a",
+            "pcm_s16le",
+            "-f",
+            "wav",
+            str(tmp_file),
+        ]
+        try:
+            pcm_file.parent.mkdir(parents=True, exist_ok=True)
+            with stats.timer("pcm_decode"):
+                result = run_ffmpeg(cmd)
+            if result.returncode == 0:
+                os.replace(tmp_file, pcm_file)
+                return True
+        except OSError:
+            pass
+        with contextlib.suppress(OSError):
+            tmp_file.unlink()
+        return False
+
+    def _evict(self, keep: Path) -> None:
+        files = []
+        for path in self.cache_dir.glob("*.wav"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            with contextlib.suppress(OSError):
+                # Clips still being cut from it keep their mapping.
+                path.unlink()
+                total -= size
+                stats.count("pcm_evictions")
+
+
+def run_ffmpeg(cmd: List[str]) -> subprocess.CompletedProcess:
+    stats.count("ffmpeg_runs")
+    with stats.timer("ffmpeg"):
+        return subprocess.run(cmd, check=False, capture_output=True, text=True)
+
+
+def extract_clip(clip: Clip) -> subprocess.CompletedProcess:
+    cmd = [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-y",
+        "-ss",
+        f"{clip.start}",
+        "-t",
+        f"{clip.duration}",
+        "-i",
+        clip.audio_file,
+        *clip.output_args,
+        clip.dest_file,
+    ]
+    return run_ffmpeg(cmd)
+
+
+def extract_clips(audio_file: str, clips: List[Clip]) -> subprocess.CompletedProcess:
+    """
+    Extract several clips from one audio file with a single ffmpeg run. Each
+    clip is an input of its own, seeked to and mapped to its own output, so
+    only the clips are decoded, however far apart they are.
+    """
+    inputs: List[str] = []
+    outputs: List[str] = []
+    for i, clip in enumerate(clips):
+        inputs.extend(
+            ["-ss", f"{clip.start}", "-t", f"{clip.duration}", "-i", audio_file]
+        )
+        outputs.extend(["-map", f"{i}:a", *clip.output_args, clip.dest_file])
+
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y"] + inputs + outputs
+    return run_ffmpeg(cmd)
+
+
+SUPERCUT_DEFAULT_SAMPLE_RATE = 44100
+SUPERCUT_DEFAULT_CHANNELS = 2
+
+
+def supercut_command(
+    clips: List[Clip], dest_file: str, options: Dict[str, Any]
+) -> List[str]:
+    """
+    The ffmpeg command that renders clips, in order, into dest_file: each clip
+    is an input of its own (seeked to, so only its span is decoded), converted
+    to a common sample rate and channel layout, then concatenated with
+    --supercut_gap seconds of silence between clips or crossfaded over
+    --crossfade seconds.
+    """
+    rate = options.get("sample_rate") or SUPERCUT_DEFAULT_SAMPLE_RATE
+    channels = options.get("channels") or SUPERCUT_DEFAULT_CHANNELS
+    layout = {1: "mono", 2: "stereo"}.get(channels, f"{channels}c")
+    gap = options.get("supercut_gap") or 0
+    crossfade = options.get("crossfade") or 0
+
+    inputs: List[str] = []
+    graph: List[str] = []
+    for i, clip in enumerate(clips):
+        inputs.extend(
+            ["-ss", f"{clip.start}", "-t", f"{clip.duration}", "-i", clip.audio_file]
+        )
+        graph.append(
+            f"[{i}:a]aresample={rate},"
+            f"aformat=sample_fmts=fltp:channel_layouts={layout}[c{i}]"
+        )
+
+    if crossfade and len(clips) > 1:
+        out = "c0"
+        for i in range(1, len(clips)):
+            # acrossfade can't fade over more than either side is long.
+            duration = min(crossfade, clips[i - 1].duration / 2, clips[i].duration / 2)
+            graph.append(f"[{out}][c{i}]acrossfade=d={duration}[x{i}]")
+            out = f"x{i}"
+    else:
+        segments = []
+        for i in range(len(clips)):
+            if i and gap:
+                graph.append(
+                    f"anullsrc=r={rate}:cl={layout},atrim=duration={gap},"
+                    f"aformat=sample_fmts=fltp[g{i}]"
+                )
+                segments.append(f"[g{i}]")
+            segments.append(f"[c{i}]")
+        graph.append(f"{''.join(segments)}concat=n={len(segments)}:v=0:a=1[out]")
+        out = "out"
+
+    return (
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y"]
+        + inputs
+        + ["-filter_complex", ";".join(graph), "-map", f"[{out}]", dest_file]
+    )
+
+
+def render_supercut(clips: List[Clip], options: Dict[str, Any]) -> bool:
+    """
+    Render clips into the --supercut file, reporting the outcome on stderr.
+    """
+    dest_file = options["supercut"]
+    if not clips:
+        print(f"No clips for {dest_file}.", file=sys.stderr)
+        return False
+
+    try:
+        Path(dest_file).parent.mkdir(parents=True, exist_ok=True)
+        with stats.timer("supercut"):
+            result = run_ffmpeg(supercut_command(clips, dest_file, options))
+        error = result.stderr.strip() if result.returncode else None
+    except OSError as e:
+        error = str(e)
+
+    if error is not None:
+        print(f"Failed to render {dest_file}: {error}", file=sys.stderr)
+        return False
+
+    print(f"Rendered {len(clips)} clips to {dest_file}.", file=sys.stderr)
+    return True
+
+
+class ClipExtractor:
+    """
+    A bounded pool of ffmpeg workers that clips are queued on as matches are
+    found, so searching and extraction overlap.
+
+    Clips are submitted per episode and extracted with one ffmpeg run per
+    episode, falling back to one run per clip if that fails (and from stream
+    copy to re-encoding, for sources that can't be cut that way). Clips found
+    in clip_cache (if given) are put in place without running ffmpeg, and the
+    rest are added to it. With pcm_cache, aif and wav clips are cut from the
+    decoded episode instead of running ffmpeg per batch. Each clip's outcome
+    is reported on stderr as it finishes, and a summary is printed when the
+    extractor is closed.
+    """
+
+    def __init__(
+        self,
+        jobs: int,
+        skip_existing: bool = False,
+        clip_cache: Optional[ClipCache] = None,
+        pcm_cache: Optional[PcmCache] = None,
+    ) -> None:
+        self.executor = ThreadPoolExecutor(max_workers=jobs)
+        self.skip_existing = skip_existing
+        self.clip_cache = clip_cache
+        self.pcm_cache = pcm_cache
+        self.lock = threading.Lock()
+        self.in_flight: Dict[str, Future] = {}
+        self.extracted = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def __enter__(self) -> "ClipExtractor":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def submit(self, clips: List[Clip]) -> None:
+        """
+        Queue clips, which must all come from the same audio file.
+        """
+        batch: Dict[str, Clip] = {}
+
+        for clip in clips:
+            # Clips already queued count as existing: run one after another,
+            # the first would have created the file before the next was
+            # considered.
+            if self.skip_existing and (
+                clip.dest_file in batch
+                or clip.dest_file in self.in_flight
+                or os.path.exists(clip.dest_file)
+            ):
+                self.skipped += 1
+                continue
+
+            # Otherwise a later clip with the same filename overwrites the
+            # earlier one.
+            batch.pop(clip.dest_file, None)
+            batch[clip.dest_file] = clip
+
+        if not batch:
+            return
+
+        previous = [
+            self.in_flight[dest_file]
+            for dest_file in batch
+            if dest_file in self.in_flight
+        ]
+        future = self.executor.submit(self._extract, list(batch.values()), previous)
+        for dest_file in batch:
+            self.in_flight[dest_file] = future
+
+    def _extract(self, clips: List[Clip], previous: List[Future]) -> None:
+        for future in previous:
+            future.result()
+
+        if self.clip_cache is not None:
+            uncached = []
+            for clip in clips:
+                if self.clip_cache.fetch(clip):
+                    self._report(clip, None)
+                else:
+                    uncached.append(clip)
+            clips = uncached
+
+        # A dest file may be a hard link to a clip_cache entry (from this run
+        # or an earlier one), and ffmpeg and the PCM writers overwrite files
+        # in place, so unlink it first to leave the cached clip untouched.
+        for clip in clips:
+            with contextlib.suppress(OSError):
+                os.unlink(clip.dest_file)
+
+        if clips and self.pcm_cache is not None:
+            clips = self._cut_from_pcm(clips)
+
+        if len(clips) > 1:
+            try:
+                result = extract_clips(clips[0].audio_file, clips)
+                if result.returncode == 0:
+                    for clip in clips:
+                        self._cache(clip)
+                        self._report(clip, None)
+                    return
+            except OSError:
+                pass
+            stats.count("ffmpeg_batch_fallbacks")
+
+        for clip in clips:
+            try:
+                result = extract_clip(clip)
+                if result.returncode and clip.output_args == STREAM_COPY_ARGS:
+                    stats.count("stream_copy_fallbacks")
+                    result = extract_clip(clip._replace(output_args=("-vn",)))
+                error = result.stderr.strip() if result.returncode else None
+            except OSError as e:
+                error = str(e)
+            if error is None:
+                self._cache(clip)
+            self._report(clip, error)
+
+    def _cut_from_pcm(self, clips: List[Clip]) -> List[Clip]:
+        """
+        Cut clips from the decoded episode, returning those left for ffmpeg:
+        all of them if their format isn't PCM or the episode can't be decoded.
+        """
+        assert self.pcm_cache is not None
+        if Path(clips[0].dest_file).suffix not in PCM_CLIP_SUFFIXES:
+            return clips
+
+        audio = self.pcm_cache.open(clips[0].audio_file, clips[0].output_args)
+        if audio is None:
+            return clips
+
+        with audio:
+            for clip in clips:
+                try:
+                    audio.write_clip(clip)
+                except OSError as e:
+                    self._report(clip, str(e))
+                    continue
+                self._cache(clip)
+                self._report(clip, None)
+        return []
+
+    def _cache(self, clip: Clip) -> None:
+        if self.clip_cache is not None:
+            self.clip_cache.store(clip)
+
+    def _report(self, clip: Clip, error: Optional[str]) -> None:
+        with self.lock:
+            stats.count("clips_extracted" if error is None else "clips_failed")
+            if error is None:
+                self.extracted += 1
+                print(f"Extracted {clip.dest_file}", file=sys.stderr)
+            else:
+                self.failed += 1
+                print(f"Failed to extract {clip.dest_file}: {error}", file=sys.stderr)
+
+    def close(self) -> None:
+        with stats.timer("extract_wait"):
+            self.executor.shutdown(wait=True)
+        if self.extracted or self.failed or self.skipped:
+            print(
+                f"Extracted {self.extracted} clips"
+                f" ({self.failed} failed, {self.skipped} skipped as existing).",
+                file=sys.stderr,
+            )
+
+
+# ---------------------------------------------------------------------------
+# Word index
+# ---------------------------------------------------------------------------
+
+INDEX_FILENAME = "index.sqlite"
+INDEX_VERSION = 3
+
+INDEX_SCHEMA = """
+CREATE TABLE transcripts (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    num_words INTEGER NOT NULL
+);
+CREATE TABLE postings (
+    word TEXT NOT NULL,
+    transcript_id INTEGER NOT NULL,
+    positions BLOB NOT NULL,
+    starts BLOB NOT NULL,
+    ends BLOB NOT NULL,
+    PRIMARY KEY (word, transcript_id)
+) WITHOUT ROWID;
+CREATE INDEX postings_transcript ON postings (transcript_id);
+CREATE TABLE vocabulary (
+    word TEXT NOT NULL PRIMARY KEY,
+    reversed TEXT NOT NULL,
+    sound TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX vocabulary_reversed ON vocabulary (reversed);
+CREATE INDEX vocabulary_sound ON vocabulary (sound);
+"""
+
+# SQLite's default limit on bound parameters is 999 in older builds.
+SQL_CHUNK_SIZE = 900
+
+
+class TranscriptIndex:
+    """
+    Positional inverted index over the transcript corpus, stored in SQLite.
+
+    Each posting maps a normalized word (as produced by read_transcript()) in
+    one transcript to the positions it occupies there and the start/end, in
+    seconds, of the cue each occurrence belongs to.
+    """
+
+    def __init__(self, index_path: Union[str, Path]) -> None:
+        self.conn = sqlite3.connect(str(index_path))
+        self._expansions: Dict[Tuple[str, Optional[int]], List[str]] = {}
+
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != INDEX_VERSION:
+            self.conn.executescript(
+                "DROP TABLE IF EXISTS postings;"
+                " DROP TABLE IF EXISTS transcripts;"
+                " DROP TABLE IF EXISTS vocabulary;"
+            )
+            self.conn.executescript(INDEX_SCHEMA)
+            self.conn.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+            self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def update(
+        self, transcript_dir: str, transcript_files: List[str]
+    ) -> Tuple[int, int]:
+        """
+        Bring the entries under transcript_dir in line with transcript_files:
+        (re)index files that are new or whose size/mtime changed, and drop
+        files that no longer exist.
+
+        Returns (number of transcripts indexed, number removed).
+        """
+        prefix = transcript_dir.rstrip(os.sep) + os.sep
+        known = {
+            path: (transcript_id, size, mtime)
+            for transcript_id, path, size, mtime in self.conn.execute(
+                "SELECT id, path, size, mtime FROM transcripts"
+            )
+            if path.startswith(prefix)
+        }
+
+        indexed = 0
+        for transcript_file in transcript_files:
+            stat = transcript_stat(transcript_file)
+            entry = known.pop(transcript_file, None)
+            if entry and entry[1] == stat.st_size and entry[2] == stat.st_mtime:
+                continue
+            if entry:
+                self._remove(entry[0])
+            self._add(transcript_file, stat)
+            indexed += 1
+
+        for transcript_id, _, _ in known.values():
+            self._remove(transcript_id)
+
+        if indexed or known:
+            # Drop words whose last occurrence was in a changed or removed
+            # transcript.
+            self.conn.execute(
+                "DELETE FROM vocabulary WHERE NOT EXISTS"
+                " (SELECT 1 FROM postings WHERE postings.word = vocabulary.word)"
+            )
+            self._expansions = {}
+
+        self.conn.commit()
+        return indexed, len(known)
+
+    def _remove(self, transcript_id: int) -> None:
+        self.conn.execute(
+            "DELETE FROM postings WHERE transcript_id = ?", (transcript_id,)
+        )
+        self.conn.execute("DELETE FROM transcripts WHERE id = ?", (transcript_id,))
+
+    def _add(self, transcript_file: str, stat: TranscriptStat) -> None:
+        cursor = self.conn.execute(
+            "INSERT INTO transcripts (path, size, mtime, num_words) VALUES (?, ?, ?, ?)",
+            (transcript_file, stat.st_size, stat.st_mtime, 0),
+        )
+        transcript_id = cursor.lastrowid
+
+        num_words = 0
+        seconds: Dict[str, float] = {}
+        postings: Dict[str, Tuple[array, array, array]] = {}
+        for position, (_, norm_word, w_start, w_end) in enumerate(
+            iter_transcript(transcript_file)
+        ):
+            num_words += 1
+            entry = postings.get(norm_word)
+            if entry is None:
+                entry = postings[norm_word] = (array("I"), array("d"), array("d"))
+            if w_start not in seconds:
+                seconds[w_start] = timestamp_to_seconds(w_start)
+            if w_end not in seconds:
+                seconds[w_end] = timestamp_to_seconds(w_end)
+            entry[0].append(position)
+            entry[1].append(seconds[w_start])
+            entry[2].append(seconds[w_end])
+
+        self.conn.execute(
+            "UPDATE transcripts SET num_words = ? WHERE id = ?",
+            (num_words, transcript_id),
+        )
+
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO vocabulary (word, reversed, sound) VALUES (?, ?, ?)",
+            ((word, word[::-1], sound_key(word)) for word in postings),
+        )
+        self.conn.executemany(
+            "INSERT INTO postings (word, transcript_id, positions, starts, ends) VALUES (?, ?, ?, ?, ?)",
+            (
+                (word, transcript_id, p.tobytes(), st.tobytes(), en.tobytes())
+                for word, (p, st, en) in postings.items()
+            ),
+        )
+
+    def expand_keyword(self, keyword: Keyword) -> Optional[List[str]]:
+        """
+        The indexed words that keyword matches (sorted), or None if it matches
+        any word.
+
+        Wildcard keywords are narrowed with range scans over the sorted
+        vocabulary (for the part before the first *) or the sorted reversed
+        vocabulary (for the part after the last *), whichever is more
+        selective, and only those words are checked against the keyword.
+
+        Fuzzy keywords expand to the words sharing their sound key (looked up
+        through the sound column) and, if edits are allowed, the words of a
+        close enough length that are within that many edits.
+        """
+        if keyword.matches_any_word():
+            return None
+        if keyword.parts is None and keyword.fuzzy_distance is None:
+            return [keyword.normalized]
+
+        key = (keyword.normalized, keyword.fuzzy_distance)
+
+        if key not in self._expansions and keyword.fuzzy_distance is not None:
+            # The keyword itself, if indexed, shares its own sound key.
+            words = {
+                word
+                for (word,) in self.conn.execute(
+                    "SELECT word FROM vocabulary WHERE sound = ?", (keyword.sound,)
+                )
+            }
+            if keyword.fuzzy_distance and len(keyword.normalized) >= FUZZY_MIN_LENGTH:
+                words.update(
+                    word
+                    for (word,) in self.conn.execute(
+                        "SELECT word FROM vocabulary"
+                        " WHERE length(word) BETWEEN ? AND ?",
+                        (
+                            len(keyword.normalized) - keyword.fuzzy_distance,
+                            len(keyword.normalized) + keyword.fuzzy_distance,
+                        ),
+                    )
+                    if keyword.matches(word)
+                )
+            self._expansions[key] = sorted(words)
+
+        if key not in self._expansions:
+            assert keyword.parts is not None
+            prefix = keyword.parts[0]
+            suffix = keyword.parts[-1][::-1]
+
+            if len(suffix) > len(prefix):
+                column, bound = "reversed", suffix
+            else:
+                column, bound = "word", prefix
+
+            if bound:
+                rows = self.conn.execute(
+                    f"SELECT word FROM vocabulary WHERE {column} >= ? AND {column} < ?",
+                    (bound, bound[:-1] + chr(ord(bound[-1]) + 1)),
+                )
+            else:
+                rows = self.conn.execute("SELECT word FROM vocabulary")
+
+            self._expansions[key] = sorted(
+                word for (word,) in rows if keyword.matches(word)
+            )
+
+        return self._expansions[key]
+
+    def _postings(self, words: List[str]) -> Iterator[Tuple[int, array, array, array]]:
+        for i in range(0, len(words), SQL_CHUNK_SIZE):
+            chunk = words[i : i + SQL_CHUNK_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            for transcript_id, positions, starts, ends in self.conn.execute(
+                "SELECT transcript_id, positions, starts, ends FROM postings"
+                f" WHERE word IN ({placeholders})",
+                chunk,
+            ):
+                p, st, en = array("I"), array("d"), array("d")
+                p.frombytes(positions)
+                st.frombytes(starts)
+                en.frombytes(ends)
+                yield transcript_id, p, st, en
+
+    def find_phrase(
+        self, term: SearchTerm, min_duration: Optional[float] = None
+    ) -> Dict[str, List[int]]:
+        """
+        Find every place the keywords of term occur consecutively.
+
+        Returns {transcript path: [position of the first word, ...]}, with
+        positions in ascending order. If min_duration is given, positions
+        whose cue span is too short to be extracted are dropped as well.
+        """
+        keywords = term.keywords
+        last = len(keywords) - 1
+
+        transcripts = {
+            transcript_id: (path, num_words)
+            for transcript_id, path, num_words in self.conn.execute(
+                "SELECT id, path, num_words FROM transcripts"
+            )
+        }
+
+        # Intersect the start positions implied by each constrained keyword.
+        candidates: Optional[Dict[int, set]] = None
+        starts: Dict[Tuple[int, int], float] = {}
+        ends: Dict[Tuple[int, int], float] = {}
+
+        for offset, keyword in enumerate(keywords):
+            words = self.expand_keyword(keyword)
+            if words is None:
+                continue
+
+            found: Dict[int, set] = {}
+            for transcript_id, positions, w_starts, w_ends in self._postings(words):
+                if candidates is not None and transcript_id not in candidates:
+                    continue
+                hits = found.setdefault(transcript_id, set())
+                for i, position in enumerate(positions):
+                    hits.add(position - offset)
+                    if min_duration is None:
+                        continue
+                    if offset == 0:
+                        starts[(transcript_id, position)] = w_starts[i]
+                    if offset == last:
+                        ends[(transcript_id, position - offset)] = w_ends[i]
+
+            if candidates is None:
+                candidates = found
+            else:
+                candidates = {
+                    transcript_id: hits & found[transcript_id]
+                    for transcript_id, hits in candidates.items()
+                    if transcript_id in found
+                }
+
+        if candidates is None:
+            # Every keyword is a bare wildcard.
+            candidates = {
+                transcript_id: set(range(num_words))
+                for transcript_id, (_, num_words) in transcripts.items()
+            }
+
+        results: Dict[str, List[int]] = {}
+        for transcript_id, hits in candidates.items():
+            path, num_words = transcripts[transcript_id]
+            positions = sorted(p for p in hits if 0 <= p and p + last < num_words)
+
+            if min_duration is not None:
+                positions = [
+                    p
+                    for p in positions
+                    if (transcript_id, p) not in starts
+                    or (transcript_id, p) not in ends
+                    or ends[(transcript_id, p)] - starts[(transcript_id, p)]
+                    >= min_duration
+                ]
+
+            if positions:
+                results[path] = positions
+
+        return results
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+SERVE_PORT = 8808
+
+# Options that belong to the server as a whole and aren't passed on to it.
+SERVER_ONLY_OPTIONS = ("help_only", "port", "serve")
+
+# The only options a request may set: what to search for and how to filter and
+# show the matches. Anything that writes files (directories, the word index,
+# stats) stays as the server was started with; it never extracts clips.
+REQUEST_OPTIONS = (
+    "context",
+    "context_exclude",
+    "fuzzy",
+    "fuzzy_distance",
+    "icontext",
+    "icontext_exclude",
+    "limit",
+    "limit_per_episode",
+    "match",
+    "min_duration",
+    "podcast",
+    "prefix_words",
+    "query",
+    "query_window",
+    "search",
+    "suffix_words",
+)
+
+
+class TranscriptCorpus:
+    """
+    Transcripts kept in memory between searches. A transcript is reloaded only
+    when its size or mtime changes, and a podcast directory is relisted only
+    when its mtime changes. Safe to share between threads.
+    """
+
+    def __init__(self, transcript_cache_dir: Optional[Union[str, Path]]) -> None:
+        self.transcript_cache_dir = transcript_cache_dir
+        self._lock = threading.Lock()
+        self._transcripts: Dict[str, Tuple[int, int, CompactTranscript]] = {}
+        self._listings: Dict[str, Tuple[int, List[str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._transcripts)
+
+    def list_podcast(self, podcast_path: Path) -> List[str]:
+        key = str(podcast_path)
+        mtime = podcast_path.stat().st_mtime_ns
+
+        with self._lock:
+            cached = self._listings.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        files = list_podcast_dir(podcast_path)
+        with self._lock:
+            self._listings[key] = (mtime, files)
+        return files
+
+    def get(self, transcript_file: str) -> CompactTranscript:
+        try:
+            stat = transcript_stat(transcript_file)
+        except FileNotFoundError:
+            with self._lock:
+                self._transcripts.pop(transcript_file, None)
+            raise
+
+        with self._lock:
+            cached = self._transcripts.get(transcript_file)
+        if (
+            cached is not None
+            and cached[0] == stat.st_size
+            and cached[1] == stat.st_mtime_ns
+        ):
+            return cached[2]
+
+        # Kept for the server's lifetime, so read rather than mapped.
+        transcript = load_transcript(
+            transcript_file, self.transcript_cache_dir, mapped=False
+        )
+        with self._lock:
+            self._transcripts[transcript_file] = (
+                stat.st_size,
+                stat.st_mtime_ns,
+                transcript,
+            )
+        return transcript
+
+    def scan(
+        self,
+        to_scan: List[Tuple[str, Optional[List[List[int]]]]],
+        matcher: TermMatcher,
+        options: Dict[str, Any],
+    ) -> Iterator[Tuple[str, Iterator[Match]]]:
+        """
+        Like scan_transcripts(), but from the transcripts held in memory.
+        """
+        for transcript_file, index_positions in to_scan:
+            try:
+                transcript = self.get(transcript_file)
+            except FileNotFoundError:
+                # Deleted since the directory was listed.
+                continue
+
+            if len(transcript) == 0:
+                continue
+
+            if index_positions is not None:
+                positions = index_positions
+            else:
+                positions = matcher.candidates(transcript)
+
+            yield transcript_file, episode_matches(
+                transcript, matcher, positions, options
+            )
+
+
+class SearchServer:
+    """
+    Runs searches given the same options as the command line, layered over
+    the server's own conf file and command-line options.
+    """
+
+    def __init__(
+        self,
+        base_options: Dict[str, Any],
+        transcript_cache_dir: Optional[Union[str, Path]],
+    ) -> None:
+        self.base_options = base_options
+        self.parser = build_arg_parser()
+        self.corpus = TranscriptCorpus(transcript_cache_dir)
+        self.index_lock = threading.Lock()
+
+    def list_transcripts(self, options: Dict[str, Any]) -> List[str]:
+        return list_transcripts(
+            Path(options["transcript_dir"]),
+            options["podcast"],
+            self.corpus.list_podcast,
+        )
+
+    def request_options(self, body: Any) -> Dict[str, Any]:
+        """
+        Turn a request's JSON object, e.g. {"search": ["foo*"], "limit": 5},
+        into options as if each key had been passed as --key on the command
+        line. true stands for a bare flag; a list repeats the option. Only
+        REQUEST_OPTIONS may be given.
+        """
+        if not isinstance(body, dict):
+            raise ValueError("Expected a JSON object of options.")
+        if not any(
+            body.get(key) or self.base_options.get(key) for key in ("search", "query")
+        ):
+            raise ValueError("You must supply at least one search term.")
+
+        argv: List[str] = []
+        for key, value in body.items():
+            if key not in REQUEST_OPTIONS:
+                raise ValueError(f"--{key} can't be set per request.")
+            for v in value if isinstance(value, list) else [value]:
+                if v is True:
+                    argv.append(f"--{key}")
+                elif v is not False and v is not None:
+                    argv.extend([f"--{key}", str(v)])
+
+        try:
+            options = merge_options(self.base_options, self.parser.parse_args(argv))
+        except SystemExit as e:
+            if isinstance(e.code, str):
+                raise ValueError(e.code.strip())
+            raise ValueError("Invalid options: " + " ".join(argv))
+
+        resolve_dirs(options, Path.cwd())
+        return options
+
+    def search(self, options: Dict[str, Any]) -> Dict[str, Any]:
+        matcher = TermMatcher.from_options(options)
+
+        with self.index_lock:
+            index_candidates = prepare_index(options, matcher)
+
+        to_scan = select_transcripts(
+            options, self.list_transcripts(options), index_candidates
+        )
+
+        found: List[Dict[str, Any]] = []
+
+        def collect(transcript_file: str, match: Match) -> None:
+            found.append(
+                {
+                    "transcript": transcript_file,
+                    "name": display_name(transcript_file, options["transcript_dir"]),
+                    "search_term": match.search_term,
+                    "start": match.start,
+                    "end": match.end,
+                    "start_seconds": match.start_seconds,
+                    "end_seconds": match.end_seconds,
+                    "context": match.context,
+                    "matched": match.matched,
+                }
+            )
+
+        process_matches(self.corpus.scan(to_scan, matcher, options), options, collect)
+
+        return {"matches": found}
+
+
+class SearchRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    POST /search with a JSON object of options returns {"matches": [...]};
+    GET /status reports how many transcripts are held in memory.
+    """
+
+    def do_GET(self) -> None:
+        search_server: SearchServer = self.server.search_server  # type: ignore
+        if self.path != "/status":
+            self._send_json(404, {"error": "Not found."})
+            return
+
+        self._send_json(200, {"transcripts_loaded": len(search_server.corpus)})
+
+    def do_POST(self) -> None:
+        search_server: SearchServer = self.server.search_server  # type: ignore
+        if self.path != "/search":
+            self._send_json(404, {"error": "Not found."})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+            options = search_server.request_options(body)
+            result = search_server.search(options)
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        except SystemExit as e:
+            # e.g. find_audio_file() giving up on an episode.
+            self._send_json(400, {"error": str(e.code).strip()})
+            return
+
+        self._send_json(200, result)
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve(
+    conf_defaults: Dict[str, Any],
+    args: argparse.Namespace,
+    options: Dict[str, Any],
+) -> None:
+    """
+    Load every transcript, then answer searches on 127.0.0.1 until
+    interrupted.
+    """
+    base_options = dict(conf_defaults)
+    for key, value in vars(args).items():
+        if key in SERVER_ONLY_OPTIONS or key == "search":
+            continue
+        if value is not None:
+            base_options[key] = value
+    for key in ("episode_dir", "transcript_dir", "cache_dir"):
+        base_options[key] = options[key]
+
+    transcript_cache_dir = (
+        None if is_flag_set(options, "no_transcript_cache") else options["cache_dir"]
+    )
+    search_server = SearchServer(base_options, transcript_cache_dir)
+
+    for transcript_file in list_transcripts(
+        Path(options["transcript_dir"]), [""], search_server.corpus.list_podcast
+    ):
+        search_server.corpus.get(transcript_file)
+    print(f"Loaded {len(search_server.corpus)} transcripts.")
+
+    port = options.get("port", SERVE_PORT)
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", port), SearchRequestHandler)
+    httpd.search_server = search_server  # type: ignore
+    print(f"Serving searches on http://127.0.0.1:{port}/search", flush=True)
+
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+
+
+# ---------------------------------------------------------------------------
+# Result cache
+# ---------------------------------------------------------------------------
+
+RESULT_CACHE_DIRNAME = "results"
+RESULT_CACHE_VERSION = 2
+RESULT_CACHE_DEFAULT_SIZE_MB = 256
+
+# The options that decide what a transcript's matches are. --podcast, --match
+# and --limit only decide which transcripts are searched, so searches that
+# differ in those share their cached matches.
+RESULT_CACHE_KEY_OPTIONS = (
+    "search",
+    "query",
+    "query_window",
+    "context",
+    "icontext",
+    "context_exclude",
+    "icontext_exclude",
+    "prefix_words",
+    "suffix_words",
+    "min_duration",
+    "limit_per_episode",
+)
+
+
+def search_options_key(options: Dict[str, Any]) -> List[Any]:
+    """
+    The options that decide which matches a search finds in a transcript.
+    """
+    return [
+        options["transcript_dir"],
+        options["fuzzy_distance"] if is_flag_set(options, "fuzzy") else None,
+    ] + [options.get(option) for option in RESULT_CACHE_KEY_OPTIONS]
+
+
+class ResultCache:
+    """
+    Each transcript's matches for one set of search options, kept in
+    cache_dir with the transcript's size and mtime, so that repeating a search
+    only scans the transcripts that are new or have changed since it last
+    ran. The files of the least recently run searches are deleted once there
+    are more than max_bytes of them.
+    """
+
+    def __init__(
+        self, cache_dir: Union[str, Path], options: Dict[str, Any], max_bytes: int
+    ) -> None:
+        key = json.dumps([RESULT_CACHE_VERSION] + search_options_key(options))
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        self.cache_dir = Path(cache_dir) / RESULT_CACHE_DIRNAME
+        self.cache_file = self.cache_dir / f"{digest}.json"
+        self.max_bytes = max_bytes
+
+        # transcript file -> [size, mtime, matches as lists of fields]
+        self.entries: Dict[str, List[Any]] = {}
+        self.changed = False
+
+        try:
+            with self.cache_file.open("r", encoding="utf-8") as f:
+                entries = json.load(f)
+            if isinstance(entries, dict):
+                self.entries = entries
+            # The mtime is what eviction goes by.
+            os.utime(self.cache_file)
+        except (OSError, ValueError):
+            pass
+
+    def scan(
+        self,
+        transcripts: List[Tuple[str, Optional[List[List[int]]]]],
+        scan: Callable[
+            [List[Tuple[str, Optional[List[List[int]]]]]],
+            Iterator[Tuple[str, Iterable[Match]]],
+        ],
+    ) -> Iterator[Tuple[str, Iterable[Match]]]:
+        """
+        Like scan(transcripts), but with the matches of unchanged transcripts
+        taken from the cache; only the rest are passed to scan(). A
+        transcript's matches are cached once they have all been consumed.
+        """
+        current: Dict[str, Optional[TranscriptStat]] = {}
+        misses: List[Tuple[str, Optional[List[List[int]]]]] = []
+        for transcript_file, index_positions in transcripts:
+            try:
+                stat: Optional[TranscriptStat] = transcript_stat(transcript_file)
+            except OSError:
+                stat = None
+            current[transcript_file] = stat
+
+            entry = self.entries.get(transcript_file)
+            if (
+                stat is None
+                or entry is None
+                or entry[0] != stat.st_size
+                or entry[1] != stat.st_mtime
+            ):
+                misses.append((transcript_file, index_positions))
+
+        stats.count("result_cache_hits", len(transcripts) - len(misses))
+        stats.count("result_cache_misses", len(misses))
+
+        missed = {transcript_file for transcript_file, _ in misses}
+        scanned = scan(misses) if misses else iter(())
+        try:
+            for transcript_file, _ in transcripts:
+                if transcript_file not in missed:
+                    yield transcript_file, [
+                        Match(*fields) for fields in self.entries[transcript_file][2]
+                    ]
+                    continue
+
+                scanned_file, matches = next(scanned)
+                yield scanned_file, self._record(
+                    scanned_file, current[scanned_file], matches
+                )
+        finally:
+            close = getattr(scanned, "close", None)
+            if close is not None:
+                close()
+
+    def _record(
+        self,
+        transcript_file: str,
+        stat: Optional[TranscriptStat],
+        matches: Iterable[Match],
+    ) -> Iterator[Match]:
+        found: List[Match] = []
+        for match in matches:
+            found.append(match)
+            yield match
+
+        if stat is not None:
+            self.entries[transcript_file] = [
+                stat.st_size,
+                stat.st_mtime,
+                [list(match) for match in found],
+            ]
+            self.changed = True
+
+    def save(self) -> None:
+        if not self.changed:
+            return
+
+        tmp_file = self.cache_file.with_name(
+            f".{self.cache_file.name}.{os.getpid()}.tmp"
+        )
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with tmp_file.open("w", encoding="utf-8") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            print(f"Could not write {self.cache_file}: {e}", file=sys.stderr)
+            return
+        self.changed = False
+
+        files = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path == self.cache_file:
+                continue
+            with contextlib.suppress(OSError):
+                path.unlink()
+                total -= size
+                stats.count("result_cache_evictions")
+
+
+# ---------------------------------------------------------------------------
+# Main logic
+# ---------------------------------------------------------------------------
+
+
+def list_transcripts(
+    transcript_dir: Path,
+    podcast_patterns: List[str],
+    list_podcast: Optional[Callable[[Path], List[str]]] = None,
+) -> List[str]:
+    """
+    Return the transcripts of every podcast directory whose title contains one
+    of podcast_patterns (case-insensitively), newest first.
+
+    list_podcast, if given, lists one podcast directory's transcripts in
+    place of globbing it.
+    """
+    if list_podcast is None:
+        list_podcast = list_podcast_dir
+
+    all_podcast_dirs = sorted([p for p in transcript_dir.glob("*") if p.is_dir()])
+    matching_transcripts: List[str] = []
+
+    for podcast_path in all_podcast_dirs:
+        podcast_title = podcast_path.name
+
+        if not podcast_patterns:
+            matching_transcripts.extend(list_podcast(podcast_path))
+        else:
+            for pattern in podcast_patterns:
+                if pattern.lower() in podcast_title.lower():
+                    matching_transcripts.extend(list_podcast(podcast_path))
+                    break
+
+    matching_transcripts.sort()
+    return list(reversed(matching_transcripts))
+
+
+def convert_transcript_file(path: str, compression: str) -> Optional[str]:
+    """
+    Rewrite path with the given compression (gz, zst or none), keeping its
+    mtime, and remove the original. Returns the new path, or None if path is
+    already compressed that way.
+    """
+    uncompressed = path
+    for suffix in (".gz", ".zst"):
+        if path.endswith(suffix):
+            uncompressed = path[: -len(suffix)]
+    new_path = uncompressed + ("" if compression == "none" else f".{compression}")
+    if new_path == path:
+        return None
+
+    stat = os.stat(path)
+    tmp_file = f"{new_path}.{os.getpid()}.tmp"
+    try:
+        with open_binary(path) as source:
+            if compression == "gz":
+                dest: BinaryIO = gzip.open(tmp_file, "wb")
+            elif compression == "zst":
+                _need_zstandard()
+                dest = zstandard.ZstdCompressor(level=10).stream_writer(
+                    open(tmp_file, "wb")
+                )
+            else:
+                dest = open(tmp_file, "wb")
+            with dest:
+                shutil.copyfileobj(source, dest)
+        os.utime(tmp_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(tmp_file, new_path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_file)
+        raise
+    os.unlink(path)
+    return new_path
+
+
+def compress_transcripts(options: Dict[str, Any]) -> None:
+    """
+    Handle --compress_transcripts: convert every transcript, and the word
+    timing file beside it, in place.
+    """
+    compression = options["compress_transcripts"]
+    converted = 0
+    bytes_before = 0
+    bytes_after = 0
+
+    for transcript_file in list_transcripts(Path(options["transcript_dir"]), [""]):
+        for path in (word_timing_file(transcript_file), transcript_file):
+            if not os.path.exists(path):
+                continue
+            size = os.path.getsize(path)
+            try:
+                new_path = convert_transcript_file(path, compression)
+            except (OSError, EOFError, zlib.error) as e:
+                print(f"Could not convert {path}: {e}", file=sys.stderr)
+                continue
+            if new_path is not None:
+                bytes_before += size
+                bytes_after += os.path.getsize(new_path)
+                if path == transcript_file:
+                    converted += 1
+
+    print(
+        f"Converted {converted} transcripts"
+        f" ({bytes_before / 1048576:.1f} MB to {bytes_after / 1048576:.1f} MB).",
+        file=message_file(options),
+    )
+
+
+def resolve_dirs(options: Dict[str, Any], script_dir: Path) -> None:
+    """
+    Make episode_dir, transcript_dir and cache_dir absolute, defaulting to
+    the directories next to this script.
+    """
+    for key, default in (
+        ("episode_dir", script_dir / "episodes"),
+        ("transcript_dir", script_dir / "transcripts"),
+        ("cache_dir", script_dir / "cache"),
+    ):
+        if options.get(key):
+            path = Path(options[key])
+            if not path.is_absolute():
+                path = Path.cwd() / path
+        else:
+            path = default
+        options[key] = str(path.resolve())
+
+
+def prepare_index(
+    options: Dict[str, Any], matcher: TermMatcher
+) -> Optional[List[Dict[str, List[int]]]]:
+    """
+    Handle --build_index, --show_expansions and --use_index. With --use_index,
+    returns each term's candidates from the index (see find_phrase()).
+    """
+    if not (
+        is_flag_set(options, "build_index")
+        or is_flag_set(options, "use_index")
+        or is_flag_set(options, "show_expansions")
+    ):
+        return None
+
+    transcript_dir = Path(options["transcript_dir"])
+    cache_dir = Path(options["cache_dir"])
+    index_candidates: Optional[List[Dict[str, List[int]]]] = None
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    index = TranscriptIndex(cache_dir / INDEX_FILENAME)
+    indexed, removed = index.update(
+        str(transcript_dir), list_transcripts(transcript_dir, [""])
+    )
+
+    if is_flag_set(options, "build_index"):
+        print(
+            f"Indexed {indexed} transcripts, removed {removed}.",
+            file=message_file(options),
+        )
+
+    if is_flag_set(options, "show_expansions"):
+        shown = set()
+        for term in matcher.phrases:
+            for keyword in term.keywords:
+                if keyword.parts is None and keyword.fuzzy_distance is None:
+                    continue
+                if keyword.normalized in shown:
+                    continue
+                shown.add(keyword.normalized)
+                words = index.expand_keyword(keyword)
+                if words is None:
+                    continue
+                print(
+                    f"{keyword.normalized} expands to {len(words)} words: "
+                    + ", ".join(words)
+                    + "\n",
+                    file=message_file(options),
+                )
+
+    if is_flag_set(options, "use_index"):
+        # A query's own duration is only known once its phrases are combined.
+        index_candidates = [
+            index.find_phrase(term, options.get("min_duration"))
+            for term in matcher.terms
+        ] + [index.find_phrase(leaf, None) for leaf in matcher.query_leaves]
+
+    index.close()
+    return index_candidates
+
+
+def select_transcripts(
+    options: Dict[str, Any],
+    matching_transcripts: List[str],
+    index_candidates: Optional[List[Dict[str, List[int]]]],
+) -> List[Tuple[str, Optional[List[List[int]]]]]:
+    """
+    Apply --match to the listed transcripts and pair each one with its
+    per-term index candidates (None when not using the index), skipping
+    transcripts the index says can't match.
+    """
+    # Filter by --match if present
+    transcripts: List[str] = []
+    if options["match"]:
+        for t in matching_transcripts:
+            filename = os.path.basename(t)
+            if any(m.lower() in filename.lower() for m in options["match"]):
+                transcripts.append(t)
+    else:
+        transcripts = matching_transcripts
+
+    stats.count("transcripts_listed", len(matching_transcripts))
+    stats.count("transcripts_selected", len(transcripts))
+
+    if index_candidates is None:
+        return [(transcript_file, None) for transcript_file in transcripts]
+
+    to_scan = [
+        (
+            transcript_file,
+            [candidates.get(transcript_file, []) for candidates in index_candidates],
+        )
+        for transcript_file in transcripts
+        if any(transcript_file in candidates for candidates in index_candidates)
+    ]
+    stats.count("transcripts_skipped_by_index", len(transcripts) - len(to_scan))
+    return to_scan
+
+
+def find_audio_file(
+    transcript_file: str, audio_file_map: AudioFileMap, podcast_patterns: List[str]
+) -> Optional[str]:
+    """
+    The audio file for a transcript, by the guid in its filename, or None
+    (saying why on stderr) if more than one file has that guid.
+    """
+    m = GUID_RE.findall(transcript_file)
+    guid = m[0] if m else None
+    if not guid:
+        sys.exit(f"Could not extract guid from {transcript_file}\n")
+
+    audio_files = sorted(set(audio_file_map.find(guid, podcast_patterns)))
+
+    if not audio_files:
+        sys.exit(f"Could not find audio for {transcript_file}\n")
+
+    if len(audio_files) > 1:
+        print(
+            f"Skipping clips for {transcript_file}: found multiple audio files"
+            f" for guid {guid}:\n\t" + "\n\t".join(audio_files),
+            file=sys.stderr,
+        )
+        return None
+
+    return audio_files[0]
+
+
+def display_name(transcript_file: str, transcript_dir: str) -> str:
+    """
+    "Podcast/Episode title" for a transcript, as shown in results, the same
+    whether or not the transcript is compressed.
+    """
+    stem = transcript_stem(transcript_file)
+    if stem != transcript_file:
+        transcript_file = stem + ".vtt"
+    return re.sub(
+        r"\s\(guid.*$",
+        "",
+        transcript_file.replace(str(transcript_dir), "").lstrip(os.sep),
+    )
+
+
+OUTPUT_MODES = ("text", "jsonl")
+
+
+def match_parts(match: Match) -> Tuple[str, str, str]:
+    """
+    A match's context split into the words before the match, the matched
+    words and the words after.
+    """
+    end = match.match_offset + len(match.matched)
+    return (
+        match.context[: match.match_offset].rstrip(),
+        match.matched,
+        match.context[end:].strip(),
+    )
+
+
+class JsonlWriter:
+    """
+    --output jsonl: writes each match to stdout as a line of JSON, flushed
+    straight away, with the fields tools would otherwise parse out of (or
+    look up for) the text output. saved_search, if set, is included too.
+    """
+
+    def __init__(self, options: Dict[str, Any]) -> None:
+        self.options = options
+        self.audio_file_map: Optional[AudioFileMap] = None
+        self.audio_files: Dict[str, Optional[str]] = {}
+        self.saved_search: Optional[str] = None
+
+    def audio_file(self, transcript_file: str, guid: Optional[str]) -> Optional[str]:
+        """
+        The transcript's audio file, or None if there isn't exactly one.
+        """
+        if transcript_file not in self.audio_files:
+            audio_files: List[str] = []
+            if guid is not None:
+                if self.audio_file_map is None:
+                    self.audio_file_map = AudioFileMap(
+                        Path(self.options["episode_dir"]),
+                        Path(self.options["cache_dir"]) / AUDIO_FILE_MAP_FILENAME,
+                    )
+                audio_files = sorted(
+                    set(self.audio_file_map.find(guid, self.options["podcast"]))
+                )
+            self.audio_files[transcript_file] = (
+                audio_files[0] if len(audio_files) == 1 else None
+            )
+        return self.audio_files[transcript_file]
+
+    def __call__(self, transcript_file: str, match: Match) -> None:
+        name = os.path.basename(transcript_stem(transcript_file))
+        m = GUID_RE.search(name)
+        guid = m.group(1) if m else None
+        prefix, matched, suffix = match_parts(match)
+
+        record: Dict[str, Any] = {
+            "podcast": os.path.basename(os.path.dirname(transcript_file)),
+            "episode": re.sub(r"\s\(guid.*$", "", name),
+            "guid": guid,
+            "transcript": transcript_file,
+            "audio_file": self.audio_file(transcript_file, guid),
+            "search_term": match.search_term,
+            "start": match.start,
+            "end": match.end,
+            "start_seconds": match.start_seconds,
+            "end_seconds": match.end_seconds,
+            "prefix": prefix,
+            "match": matched,
+            "suffix": suffix,
+        }
+        if self.saved_search is not None:
+            record["saved_search"] = self.saved_search
+
+        sys.stdout.write(json.dumps(record) + "\n")
+        sys.stdout.flush()
+
+
+def match_clip(match: Match, audio_file: str, options: Dict[str, Any]) -> Clip:
+    """
+    The clip to extract for a match, padded by --before/--after.
+    """
+    # Queries like "a NEAR/3 b" would otherwise name a subdirectory.
+    label = match.search_term.replace(os.sep, "_")
+    base_name = f"{label} - {os.path.basename(audio_file)}"
+    base_name = base_name[:200]
+    stamp = seconds_to_filename_stamp(match.start_seconds)
+    suffix = OUTPUT_FORMATS[options["output_format"]][0]
+    if suffix is None:
+        suffix = os.path.splitext(audio_file)[1]
+
+    dest_file = os.path.join(
+        options["output_dir"],
+        f"{base_name} - {stamp}{suffix}",
+    )
+
+    clip_start = match.start_seconds - options["before"]
+    if clip_start < 0:
+        clip_start = 0.0
+    clip_duration = (
+        match.end_seconds - match.start_seconds + options["before"] + options["after"]
+    )
+
+    return Clip(audio_file, dest_file, clip_start, clip_duration, output_args(options))
+
+
+def process_matches(
+    results: Iterable[Tuple[str, Iterable[Match]]],
+    options: Dict[str, Any],
+    on_match: Callable[[str, Match], None],
+) -> int:
+    """
+    Hand each match from results to on_match, queueing its clip for
+    extraction with --extract (and collecting it for --supercut), until
+    --limit is reached.
+
+    Returns the number of matches found.
+    """
+    audio_file_map: Optional[AudioFileMap] = None
+    if options.get("extract") or options.get("supercut"):
+        audio_file_map = AudioFileMap(
+            Path(options["episode_dir"]),
+            Path(options["cache_dir"]) / AUDIO_FILE_MAP_FILENAME,
+        )
+
+    matches_found = 0
+    supercut_clips: List[Clip] = []
+
+    clip_cache: Optional[ClipCache] = None
+    if options.get("extract") and not is_flag_set(options, "no_clip_cache"):
+        clip_cache = ClipCache(options["cache_dir"])
+
+    pcm_cache: Optional[PcmCache] = None
+    if options.get("extract") and is_flag_set(options, "pcm_cache"):
+        pcm_cache = PcmCache(
+            options["cache_dir"], options["pcm_cache_size"] * 1024 * 1024
+        )
+
+    with ClipExtractor(
+        options["extract_jobs"],
+        bool(options.get("skip_existing")),
+        clip_cache,
+        pcm_cache,
+    ) as extractor:
+        for transcript_file, matches in results:
+            clips: List[Clip] = []
+            audio_file: Optional[str] = None
+            audio_file_looked_up = False
+            limit_reached = False
+
+            for match in matches:
+                matches_found += 1
+                stats.count("matches_reported")
+
+                on_match(transcript_file, match)
+
+                if audio_file_map is not None:
+                    # Only looked up once the episode has a match to cut.
+                    if not audio_file_looked_up:
+                        audio_file = find_audio_file(
+                            transcript_file, audio_file_map, options["podcast"]
+                        )
+                        audio_file_looked_up = True
+
+                    if audio_file is not None:
+                        clips.append(match_clip(match, audio_file, options))
+
+                if options.get("limit") is not None and matches_found == int(
+                    options["limit"]
+                ):
+                    limit_reached = True
+                    break
+
+            if clips and options.get("merge_gap") is not None:
+                clips = merge_clips(clips, options["merge_gap"])
+
+            if clips and options.get("supercut"):
+                supercut_clips.extend(clips)
+
+            if clips and options.get("extract"):
+                extractor.submit(clips)
+
+            if limit_reached:
+                break
+
+    if options.get("supercut"):
+        render_supercut(supercut_clips, options)
+
+    return matches_found
+
+
+def main() -> None:
+    search()
+
+
+def search() -> None:
+    script_dir = Path(__file__).resolve().parent
+
+    # Load defaults from conf
+    conf_defaults = default_options_from_conf("dropseeker.conf")
+    # CLI
+    parser = build_arg_parser()
+    args = parser.parse_args()
+    # JSON lines have to be all there is on stdout.
+    if (args.output or conf_defaults.get("output")) != "jsonl":
+        print(conf_defaults)
+
+    if args.help_only:
+        print(usage())
+        return
+
+    options = merge_options(conf_defaults, args)
+    resolve_dirs(options, script_dir)
+
+    if is_flag_set(options, "serve"):
+        serve(conf_defaults, args, options)
+        return
+
+    stats.enabled = stats_enabled(options)
+    search_start = time.perf_counter()
+
+    if options.get("compress_transcripts"):
+        compress_transcripts(options)
+
+    searches: List[SavedSearch] = []
+    if options.get("queries_file"):
+        searches = read_queries_file(options)
+        options = combine_saved_searches(options, searches)
+
+    matcher = TermMatcher.from_options(options)
+    with stats.timer("index"):
+        index_candidates = prepare_index(options, matcher)
+
+    if not options["search"] and not options["query"]:
+        report_stats(options, search_start)
+        return
+
+    transcript_cache_dir = (
+        None if is_flag_set(options, "no_transcript_cache") else options["cache_dir"]
+    )
+
+    manifest = TranscriptManifest(
+        Path(options["transcript_dir"]),
+        Path(options["cache_dir"]) / MANIFEST_FILENAME,
+    )
+
+    def print_match(transcript_file: str, match: Match) -> None:
+        if options.get("min_duration") is not None:
+            duration = match.end_seconds - match.start_seconds
+            print(f"Duration: {duration} seconds")
+
+        rel_name = display_name(transcript_file, options["transcript_dir"])
+        if is_flag_set(options, "fuzzy"):
+            print(f"{rel_name} @ {match.start} ({match.matched}):")
+        else:
+            print(f"{rel_name} @ {match.start}:")
+        print(f"\t{match.context}\n")
+
+    def print_search(search: SavedSearch) -> None:
+        print(f"== {search.label} ==\n")
+
+    on_match: Callable[[str, Match], None] = print_match
+    on_search: Callable[[SavedSearch], None] = print_search
+    if options["output"] == "jsonl":
+        jsonl_writer = JsonlWriter(options)
+        on_match = jsonl_writer
+
+        def label_matches(search: SavedSearch) -> None:
+            jsonl_writer.saved_search = search.label
+
+        on_search = label_matches
+
+    if is_flag_set(options, "watch"):
+        watch(options, matcher, manifest, transcript_cache_dir, on_match)
+        return
+
+    with stats.timer("discover"):
+        manifest.refresh()
+        to_scan = select_transcripts(
+            options,
+            list_transcripts(
+                Path(options["transcript_dir"]),
+                options["podcast"],
+                manifest.list_podcast,
+            ),
+            index_candidates,
+        )
+
+    if searches:
+        with contextlib.closing(
+            scan_batch(to_scan, matcher, searches, options, transcript_cache_dir)
+        ) as batch_results:
+            process_saved_searches(batch_results, searches, on_match, on_search)
+    else:
+
+        def scan(
+            transcripts: List[Tuple[str, Optional[List[List[int]]]]],
+        ) -> Iterator[Tuple[str, Iterable[Match]]]:
+            return scan_transcripts(transcripts, matcher, options, transcript_cache_dir)
+
+        result_cache: Optional[ResultCache] = None
+        if not is_flag_set(options, "no_cache"):
+            result_cache = ResultCache(
+                options["cache_dir"],
+                options,
+                options["result_cache_size"] * 1024 * 1024,
+            )
+
+        with contextlib.closing(
+            scan(to_scan) if result_cache is None else result_cache.scan(to_scan, scan)
+        ) as results:
+            process_matches(results, options, on_match)
+
+        if result_cache is not None:
+            result_cache.save()
+
+    report_stats(options, search_start)
+
+
+def watch(
+    options: Dict[str, Any],
+    matcher: TermMatcher,
+    manifest: TranscriptManifest,
+    transcript_cache_dir: Optional[str],
+    on_match: Callable[[str, Match], None],
+) -> None:
+    """
+    Every --watch_interval seconds, search the transcripts that are new or
+    changed since the previous pass.
+
+    Which transcripts have been searched is kept in cache_dir per set of
+    searches and the options filtering them, so a restarted watch picks up
+    where it left off; the first ever pass only records what is already there.
+    """
+    state_key = hashlib.sha1(
+        json.dumps(
+            search_options_key(options) + [options["podcast"], options["match"]]
+        ).encode("utf-8")
+    ).hexdigest()
+    state_file = Path(options["cache_dir"]) / f"watch-{state_key}.json"
+
+    searched: Optional[Dict[str, List[float]]] = None
+    try:
+        with state_file.open("r", encoding="utf-8") as f:
+            searched = json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    while True:
+        manifest.refresh(check_files=True)
+        current = {
+            path: [entry["size"], entry["mtime"]]
+            for path, entry in manifest.entries().items()
+        }
+
+        if searched is None:
+            print(f"Watching {len(current)} transcripts.", file=sys.stderr)
+        else:
+            changed = {
+                path for path, seen in current.items() if searched.get(path) != seen
+            }
+            if changed:
+                index_candidates = prepare_index(options, matcher)
+                to_scan = select_transcripts(
+                    options,
+                    [
+                        transcript_file
+                        for transcript_file in list_transcripts(
+                            Path(options["transcript_dir"]),
+                            options["podcast"],
+                            manifest.list_podcast,
+                        )
+                        if transcript_file in changed
+                    ],
+                    index_candidates,
+                )
+                with contextlib.closing(
+                    scan_transcripts(to_scan, matcher, options, transcript_cache_dir)
+                ) as results:
+                    process_matches(results, options, on_match)
+                sys.stdout.flush()
+
+        if current != searched:
+            searched = current
+            try:
+                state_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file = state_file.with_name(f"{state_file.name}.{os.getpid()}.tmp")
+                with tmp_file.open("w", encoding="utf-8") as f:
+                    json.dump(searched, f)
+                os.replace(tmp_file, state_file)
+            except OSError as e:
+                print(f"Could not write {state_file}: {e}", file=sys.stderr)
+
+        time.sleep(options["watch_interval"])
+
+
+def stats_enabled(options: Dict[str, Any]) -> bool:
+    return is_flag_set(options, "stats") or bool(options.get("stats_json"))
+
+
+def report_stats(options: Dict[str, Any], search_start: float) -> None:
+    """
+    Print the collected stats with --stats and write them with --stats_json.
+    """
+    if not stats.enabled:
+        return
+
+    stats.add_time("total", time.perf_counter() - search_start)
+
+    if is_flag_set(options, "stats"):
+        stats.print_report(options["transcript_dir"])
 
-    # end for each transcript
+    if options.get("stats_json"):
+        try:
+            with open(options["stats_json"], "w", encoding="utf-8") as f:
+                json.dump(stats.report(), f, indent=2)
+        except OSError as e:
+            print(f"Could not write {options['stats_json']}: {e}", file=sys.stderr)
 
 
 if __name__ == "__main__":
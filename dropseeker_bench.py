@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for dropseeker.py against synthetic podcast corpora.
+
+Generates transcripts (and empty audio stubs) in the same layout as fetch.php,
+times parsing and a set of search workloads at each corpus size, and writes
+the results as JSON so runs can be compared across versions.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import dropseeker
+
+# ---------------------------------------------------------------------------
+# Corpus generation
+# ---------------------------------------------------------------------------
+
+CONSONANTS = "bcdfghjklmnprstvwz"
+VOWELS = "aeiou"
+
+# Roughly conversational speech.
+WORDS_PER_SECOND = 2.5
+
+CORPUS_PARAMS_FILENAME = "corpus.json"
+
+
+def make_vocabulary(rng: random.Random, size: int) -> List[str]:
+    """
+    size distinct pronounceable words, in rank order (most common first).
+    """
+    words: List[str] = []
+    seen = set()
+    while len(words) < size:
+        syllables = rng.choice((1, 1, 2, 2, 2, 3))
+        word = "".join(
+            rng.choice(CONSONANTS) + rng.choice(VOWELS) for _ in range(syllables)
+        )
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+def write_transcript(
+    path: Path,
+    rng: random.Random,
+    vocabulary: List[str],
+    weights: List[float],
+    seconds: float,
+    cue_seconds: float,
+) -> int:
+    """
+    Write one WebVTT transcript about seconds long. Returns its word count.
+    """
+    lines = ["WEBVTT", ""]
+    t = 0.0
+    num_words = 0
+
+    while t < seconds:
+        duration = cue_seconds * rng.uniform(0.5, 1.5)
+        count = max(1, round(duration * WORDS_PER_SECOND))
+        words = rng.choices(vocabulary, weights, k=count)
+
+        # Some capitalization and punctuation, for normalization to strip.
+        if rng.random() < 0.3:
+            words[0] = words[0].capitalize()
+        if rng.random() < 0.5:
+            words[-1] += rng.choice(".,?!")
+
+        lines.append(
+            f"{dropseeker.format_timestamp(t)} --> "
+            f"{dropseeker.format_timestamp(t + duration)}"
+        )
+        lines.append(" ".join(words))
+        lines.append("")
+
+        num_words += count
+        t += duration
+
+    path.write_text("\n".join(lines), encoding="utf-8")
+    return num_words
+
+
+def generate_corpus(root: Path, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Generate transcripts/ and episodes/ under root, unless root already holds
+    a corpus generated with the same params. Returns the corpus description.
+    """
+    params_file = root / CORPUS_PARAMS_FILENAME
+    if params_file.exists():
+        existing = json.loads(params_file.read_text())
+        if existing.get("params") == params:
+            return existing
+
+    rng = random.Random(params["seed"])
+    vocabulary = make_vocabulary(rng, params["vocabulary"])
+    weights = [1 / (rank + 1) ** params["zipf"] for rank in range(len(vocabulary))]
+
+    num_words = 0
+    num_episodes = 0
+    for p in range(params["podcasts"]):
+        podcast = f"Podcast {p + 1}"
+        transcript_dir = root / "transcripts" / podcast
+        episode_dir = root / "episodes" / podcast
+        transcript_dir.mkdir(parents=True, exist_ok=True)
+        episode_dir.mkdir(parents=True, exist_ok=True)
+
+        for e in range(params["episodes_per_podcast"]):
+            guid = f"p{p + 1}e{e + 1}-{rng.getrandbits(32):08x}"
+            title = f"2024-01-{e % 28 + 1:02d} - Episode {e + 1} (guid={guid})"
+            num_words += write_transcript(
+                transcript_dir / f"{title}.vtt",
+                rng,
+                vocabulary,
+                weights,
+                params["minutes_per_episode"] * 60,
+                params["cue_seconds"],
+            )
+            (episode_dir / f"{title}.mp3").write_bytes(b"")
+            num_episodes += 1
+
+    corpus = {
+        "params": params,
+        "episodes": num_episodes,
+        "words": num_words,
+        "vocabulary": vocabulary,
+    }
+    params_file.write_text(json.dumps(corpus))
+    return corpus
+
+
+# ---------------------------------------------------------------------------
+# Workloads
+# ---------------------------------------------------------------------------
+
+
+def workload_searches(vocabulary: List[str]) -> Dict[str, List[str]]:
+    """
+    Command-line arguments for each search workload, picking words by rank so
+    every corpus generated from the same params searches for the same things.
+    """
+    common, frequent, rare = (
+        vocabulary[2],
+        vocabulary[10],
+        vocabulary[200 % len(vocabulary)],
+    )
+    return {
+        "single_term": ["--search", frequent],
+        "multi_term": [
+            "--search",
+            f"{common} {frequent}",
+            "--search",
+            rare,
+            "--search",
+            f"{vocabulary[5]} * {vocabulary[6]}",
+        ],
+        "wildcard": ["--search", f"{common[:2]}*", "--search", f"*{rare[-2:]}"],
+        "context_filtered": [
+            "--search",
+            frequent,
+            "--icontext",
+            vocabulary[1],
+            "--context_exclude",
+            vocabulary[3],
+        ],
+    }
+
+
+def search_options(corpus_dir: Path, work_dir: Path, argv: List[str]) -> Dict[str, Any]:
+    args = dropseeker.build_arg_parser().parse_args(
+        argv
+        + [
+            "--transcript_dir",
+            str(corpus_dir / "transcripts"),
+            "--episode_dir",
+            str(corpus_dir / "episodes"),
+            "--cache_dir",
+            str(work_dir / "cache"),
+            "--output_dir",
+            str(work_dir / "clips"),
+        ]
+    )
+    options = dropseeker.merge_options({}, args)
+    dropseeker.resolve_dirs(options, Path.cwd())
+    return options
+
+
+def run_search(
+    options: Dict[str, Any], transcript_cache_dir: Optional[str]
+) -> List[Tuple[str, dropseeker.Match]]:
+    matcher = dropseeker.TermMatcher(options["search"])
+    transcripts = dropseeker.list_transcripts(
+        Path(options["transcript_dir"]), options["podcast"]
+    )
+    return [
+        (transcript_file, match)
+        for transcript_file in transcripts
+        for match in dropseeker.scan_transcript(
+            transcript_file, matcher, options, transcript_cache_dir
+        )
+    ]
+
+
+def plan_extraction(
+    options: Dict[str, Any], matches: List[Tuple[str, dropseeker.Match]]
+) -> int:
+    """
+    Everything --extract does short of running ffmpeg. Returns the number of
+    clips planned.
+    """
+    audio_file_map = dropseeker.AudioFileMap(
+        Path(options["episode_dir"]),
+        Path(options["cache_dir"]) / dropseeker.AUDIO_FILE_MAP_FILENAME,
+    )
+    clips = []
+    for transcript_file, match in matches:
+        audio_file = dropseeker.find_audio_file(
+            transcript_file, audio_file_map, options["podcast"]
+        )
+        if audio_file is not None:
+            clips.append(dropseeker.match_clip(match, audio_file, options))
+    return len(clips)
+
+
+def time_best(fn: Callable[[], int], repeat: int) -> Tuple[float, List[float], int]:
+    """
+    Run fn repeat times. Returns the fastest time, all times, and fn's result.
+    """
+    runs: List[float] = []
+    result = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - start)
+    return min(runs), runs, result
+
+
+def bench_corpus(
+    corpus_dir: Path, corpus: Dict[str, Any], repeat: int
+) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+
+    with tempfile.TemporaryDirectory(prefix="dropseeker-bench-") as tmp:
+        work_dir = Path(tmp)
+        transcripts = dropseeker.list_transcripts(corpus_dir / "transcripts", [""])
+        cache_dir = str(work_dir / "cache")
+
+        def record(workload: str, mode: str, fn: Callable[[], int]) -> None:
+            best, runs, count = time_best(fn, repeat)
+            results.append(
+                {
+                    "episodes": corpus["episodes"],
+                    "words": corpus["words"],
+                    "workload": workload,
+                    "mode": mode,
+                    "seconds": best,
+                    "runs": runs,
+                    "count": count,
+                }
+            )
+            print(
+                f"{corpus['episodes']:>6} episodes  {workload:<18} {mode:<6} "
+                f"{best:9.4f}s  ({count})",
+                file=sys.stderr,
+            )
+
+        record(
+            "parse",
+            "vtt",
+            lambda: sum(len(dropseeker.read_transcript(t)) for t in transcripts),
+        )
+
+        # Populate the binary transcript cache before timing reads from it.
+        for t in transcripts:
+            dropseeker.load_transcript(t, cache_dir)
+        record(
+            "parse",
+            "cache",
+            lambda: sum(
+                len(dropseeker.load_transcript(t, cache_dir)) for t in transcripts
+            ),
+        )
+
+        for workload, argv in workload_searches(corpus["vocabulary"]).items():
+            options = search_options(corpus_dir, work_dir, argv)
+            record(workload, "vtt", lambda: len(run_search(options, None)))
+            record(workload, "cache", lambda: len(run_search(options, cache_dir)))
+
+        options = search_options(
+            corpus_dir, work_dir, workload_searches(corpus["vocabulary"])["multi_term"]
+        )
+        matches = run_search(options, cache_dir)
+        record("extraction_plan", "cache", lambda: plan_extraction(options, matches))
+
+    return results
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Benchmark dropseeker.py against synthetic podcast corpora.",
+    )
+    parser.add_argument(
+        "--sizes",
+        default="12,60",
+        help="Comma-separated corpus sizes, in episodes per podcast (default 12,60).",
+    )
+    parser.add_argument(
+        "--podcasts", type=int, default=3, help="Podcasts per corpus (default 3)."
+    )
+    parser.add_argument(
+        "--minutes_per_episode",
+        type=float,
+        default=60,
+        help="Length of each episode (default 60).",
+    )
+    parser.add_argument(
+        "--cue_seconds",
+        type=float,
+        default=4,
+        help="Average WebVTT cue length (default 4).",
+    )
+    parser.add_argument(
+        "--vocabulary",
+        type=int,
+        default=5000,
+        help="Distinct words in the corpus (default 5000).",
+    )
+    parser.add_argument(
+        "--zipf",
+        type=float,
+        default=1.1,
+        help="Skew of word frequencies; higher is more skewed (default 1.1).",
+    )
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default 1).")
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per workload; the best counts."
+    )
+    parser.add_argument(
+        "--corpus_dir",
+        help="Keep generated corpora here and reuse them (default: a temp directory).",
+    )
+    parser.add_argument(
+        "--generate_only",
+        action="store_true",
+        help="Generate the corpora in --corpus_dir without benchmarking.",
+    )
+    parser.add_argument(
+        "--output", help="Write the JSON results here instead of to stdout."
+    )
+    return parser
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    args = build_arg_parser().parse_args()
+
+    if args.generate_only and not args.corpus_dir:
+        sys.exit("--generate_only needs --corpus_dir.\n")
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    with tempfile.TemporaryDirectory(prefix="dropseeker-corpus-") as tmp:
+        corpus_root = Path(args.corpus_dir) if args.corpus_dir else Path(tmp)
+
+        results: List[Dict[str, Any]] = []
+        for size in sizes:
+            params = {
+                "podcasts": args.podcasts,
+                "episodes_per_podcast": size,
+                "minutes_per_episode": args.minutes_per_episode,
+                "cue_seconds": args.cue_seconds,
+                "vocabulary": args.vocabulary,
+                "zipf": args.zipf,
+                "seed": args.seed,
+            }
+            corpus_dir = corpus_root / f"{args.podcasts}x{size}"
+            print(f"Generating {corpus_dir}", file=sys.stderr)
+            corpus = generate_corpus(corpus_dir, params)
+
+            if not args.generate_only:
+                results.extend(bench_corpus(corpus_dir, corpus, args.repeat))
+
+    if args.generate_only:
+        return
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
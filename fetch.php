@@ -226,7 +226,8 @@ foreach ( $xml->channel->item as $item ) {
 		}
 	}
 
-	$transcript_files = glob( $transcript_dir . "*(guid=" . $guid . ")*.vtt" );
+	// Transcripts may have been compressed with dropseeker.py --compress_transcripts.
+	$transcript_files = glob( $transcript_dir . "*(guid=" . $guid . ")*.{vtt,vtt.gz,vtt.zst}", GLOB_BRACE );
 
 	if ( ! isset( $options['fetch_only'] ) && empty( $transcript_files ) ) {
 		if ( isset( $options['confirm'] ) ) {
@@ -248,6 +249,8 @@ foreach ( $xml->channel->item as $item ) {
 			$whisper_args = array(
 				'model' => 'tiny',
 				'output_dir' => $transcript_dir,
+				// The .json written next to each .vtt then carries per-word timing, which Dropseeker uses for tighter clips.
+				'word_timestamps' => 'True',
 			);
 
 			// Check the default args from dropseeker.conf first.
@@ -293,6 +296,10 @@ foreach ( $xml->channel->item as $item ) {
 						continue;
 					}
 
+					if ( 'word_timestamps' == $arg ) {
+						continue;
+					}
+
 
 					$whisper_command .= ' --' . $arg;
 
@@ -301,7 +308,7 @@ foreach ( $xml->channel->item as $item ) {
 					}
 				}
 
-				$whisper_command .= ' -m ' . escapeshellarg( $options['whisper_cpp'] . '/models/ggml-' . $whisper_args['model'] . '.bin' ) . ' --output-vtt -f ' . escapeshellarg( $tmp_file ) . ' --output-file ' . escapeshellarg( rtrim( $whisper_args['output_dir'], '/' ) . '/' . pathinfo( $audio_file, PATHINFO_FILENAME ) );
+				$whisper_command .= ' -m ' . escapeshellarg( $options['whisper_cpp'] . '/models/ggml-' . $whisper_args['model'] . '.bin' ) . ' --output-vtt' . ( $whisper_args['word_timestamps'] !== 'False' ? ' --output-json-full' : '' ) . ' -f ' . escapeshellarg( $tmp_file ) . ' --output-file ' . escapeshellarg( rtrim( $whisper_args['output_dir'], '/' ) . '/' . pathinfo( $audio_file, PATHINFO_FILENAME ) );
 
 //				echo "Temp file is " . $tmp_file . "\n";
 //				echo "ffmpeg command is " . $ffmpeg_command . "\n";
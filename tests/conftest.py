@@ -0,0 +1,156 @@
+"""
+Shared fixtures: a small synthetic transcript corpus and a way to run
+dropseeker.py against it.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import subprocess
+import sys
+from pathlib import Path
+from typing import Callable, List
+
+import pytest
+
+SCRIPT = Path(__file__).resolve().parent.parent / "dropseeker.py"
+
+WORDS = (
+    "the a and i you it of to that is was so we what this "
+    "great day have nice Chili's Doughboys spoonman fries world "
+    "don't I'm we're 42 #1 ΟΔΟΣ hello restaurant chilis dog dogs"
+).split()
+
+PODCASTS = ("Doughboys", "Spoonin")
+EPISODES = 3
+CUES = 150
+
+
+def _timestamp(seconds: float) -> str:
+    minutes, seconds = divmod(seconds, 60)
+    return f"{int(minutes):02d}:{seconds:06.3f}"
+
+
+def write_transcript(path: Path, rng: random.Random) -> None:
+    lines = ["WEBVTT", ""]
+    start = 0.0
+    for _ in range(CUES):
+        end = start + rng.uniform(0.5, 4.0)
+        words = rng.choices(WORDS, k=rng.randint(1, 12))
+        if rng.random() < 0.1:
+            words[-1] += rng.choice((",", ".", "?"))
+        lines.append(f"{_timestamp(start)} --> {_timestamp(end)}")
+        lines.append(" ".join(words))
+        lines.append("")
+        start = end
+    path.write_text("\n".join(lines), encoding="utf-8")
+
+
+@pytest.fixture(scope="session")
+def corpus(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """
+    A directory holding transcripts/<podcast>/<episode>.vtt and, for each,
+    a placeholder episodes/<podcast>/<episode>.mp3.
+    """
+    root = tmp_path_factory.mktemp("corpus")
+    rng = random.Random(1)
+    for podcast in PODCASTS:
+        podcast_dir = root / "transcripts" / podcast
+        podcast_dir.mkdir(parents=True)
+        (root / "episodes" / podcast).mkdir(parents=True)
+        for episode in range(EPISODES):
+            name = (
+                f"2023-0{episode + 1}-01 - Episode {episode} (guid={podcast}{episode})"
+            )
+            write_transcript(podcast_dir / f"{name}.vtt", rng)
+            (root / "episodes" / podcast / f"{name}.mp3").write_bytes(b"\0" * 64)
+    return root
+
+
+@pytest.fixture
+def dropseeker_process(
+    corpus: Path, tmp_path: Path
+) -> Callable[..., subprocess.CompletedProcess]:
+    """
+    Run dropseeker.py over the corpus with the given arguments, in the test's
+    own directory (which caches and clips go to), and return the finished
+    process.
+    """
+
+    def run(*args: str) -> subprocess.CompletedProcess:
+        cmd: List[str] = [
+            sys.executable,
+            str(SCRIPT),
+            "--transcript_dir",
+            str(corpus / "transcripts"),
+            "--episode_dir",
+            str(corpus / "episodes"),
+            "--cache_dir",
+            str(tmp_path / "cache"),
+            *args,
+        ]
+        return subprocess.run(cmd, cwd=tmp_path, capture_output=True, text=True)
+
+    return run
+
+
+@pytest.fixture
+def run_dropseeker(
+    dropseeker_process: Callable[..., subprocess.CompletedProcess],
+) -> Callable[..., str]:
+    """
+    Like dropseeker_process, but checks that the run succeeded and returns
+    its stdout.
+    """
+
+    def run(*args: str) -> str:
+        result = dropseeker_process(*args)
+        assert result.returncode == 0, result.stderr
+        return result.stdout
+
+    return run
+
+
+FAKE_FFMPEG = """#!{python}
+import json, os, sys
+
+args = sys.argv[1:]
+with open(os.environ["FAKE_FFMPEG_LOG"], "a") as log:
+    log.write(json.dumps(args) + "\\n")
+
+if os.environ.get("FAKE_FFMPEG_FAIL_BATCH") and args.count("-i") > 1:
+    sys.exit("batch failed")
+
+# Every argument that isn't an option or an option's value is an output.
+i = 0
+while i < len(args):
+    if args[i] in ("-hide_banner", "-y", "-vn"):
+        i += 1
+    elif args[i].startswith("-"):
+        i += 2
+    else:
+        with open(args[i], "w") as f:
+            f.write(json.dumps(args))
+        i += 1
+"""
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """
+    Put an ffmpeg on PATH that writes each output file without decoding
+    anything, and logs its arguments as a line of JSON to the returned file.
+    With FAKE_FFMPEG_FAIL_BATCH set, runs with several inputs fail.
+    """
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    ffmpeg = bin_dir / "ffmpeg"
+    ffmpeg.write_text(FAKE_FFMPEG.format(python=sys.executable))
+    ffmpeg.chmod(0o755)
+
+    log = tmp_path / "ffmpeg.log"
+    log.touch()
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_FFMPEG_LOG", str(log))
+    return log
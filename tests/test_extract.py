@@ -0,0 +1,130 @@
+"""
+--extract queues each episode's clips on a pool of ffmpeg workers, one run
+per episode, with a summary of what was extracted.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import subprocess
+from pathlib import Path
+from typing import Callable, List, Set
+
+import pytest
+
+SEARCH = ["--search", "great", "--limit_per_episode", "4"]
+
+
+def ffmpeg_runs(log: Path) -> List[List[str]]:
+    return [json.loads(line) for line in log.read_text().splitlines()]
+
+
+def clip_files(tmp_path: Path) -> Set[str]:
+    return {path.name for path in (tmp_path / "clips").glob("*.aif")}
+
+
+def summary(result: subprocess.CompletedProcess) -> str:
+    lines = [line for line in result.stderr.splitlines() if " clips (" in line]
+    assert len(lines) == 1, result.stderr
+    return lines[0]
+
+
+def extract(
+    dropseeker_process: Callable[..., subprocess.CompletedProcess],
+    tmp_path: Path,
+    *args: str,
+) -> subprocess.CompletedProcess:
+    result = dropseeker_process(
+        *SEARCH,
+        "--extract",
+        "--no_clip_cache",
+        "--output_dir",
+        str(tmp_path / "clips"),
+        *args,
+    )
+    assert result.returncode == 0, result.stderr
+    return result
+
+
+def test_one_ffmpeg_run_per_episode(
+    dropseeker_process: Callable[..., subprocess.CompletedProcess],
+    tmp_path: Path,
+    fake_ffmpeg: Path,
+) -> None:
+    result = extract(dropseeker_process, tmp_path)
+
+    episodes = set(re.findall(r"^(\S+/.+?) @ ", result.stdout, re.MULTILINE))
+    runs = ffmpeg_runs(fake_ffmpeg)
+    assert len(runs) == len(episodes) > 1
+
+    outputs = {Path(arg).name for run in runs for arg in run if arg.endswith(".aif")}
+    assert len(outputs) > len(runs)
+    assert outputs == clip_files(tmp_path)
+    assert summary(result) == (
+        f"Extracted {len(outputs)} clips (0 failed, 0 skipped as existing)."
+    )
+
+
+def test_skip_existing(
+    dropseeker_process: Callable[..., subprocess.CompletedProcess],
+    tmp_path: Path,
+    fake_ffmpeg: Path,
+) -> None:
+    extract(dropseeker_process, tmp_path)
+    fake_ffmpeg.write_text("")
+
+    result = extract(dropseeker_process, tmp_path, "--skip_existing")
+
+    # Every match's clip is skipped, including those sharing a file.
+    matches = result.stdout.count(" @ ")
+    assert ffmpeg_runs(fake_ffmpeg) == []
+    assert summary(result) == (
+        f"Extracted 0 clips (0 failed, {matches} skipped as existing)."
+    )
+
+
+def test_failed_batch_falls_back_to_one_run_per_clip(
+    dropseeker_process: Callable[..., subprocess.CompletedProcess],
+    tmp_path: Path,
+    fake_ffmpeg: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("FAKE_FFMPEG_FAIL_BATCH", "1")
+    result = extract(dropseeker_process, tmp_path)
+
+    runs = ffmpeg_runs(fake_ffmpeg)
+    single = [run for run in runs if run.count("-i") == 1]
+    assert len(single) == len(clip_files(tmp_path))
+    assert summary(result) == (
+        f"Extracted {len(single)} clips (0 failed, 0 skipped as existing)."
+    )
+
+
+def test_extract_jobs_extracts_the_same_clips(
+    dropseeker_process: Callable[..., subprocess.CompletedProcess],
+    tmp_path: Path,
+    fake_ffmpeg: Path,
+) -> None:
+    extract(dropseeker_process, tmp_path, "--extract_jobs", "1")
+    serial = {
+        path.name: path.read_text() for path in (tmp_path / "clips").glob("*.aif")
+    }
+    for path in (tmp_path / "clips").glob("*.aif"):
+        path.unlink()
+
+    extract(dropseeker_process, tmp_path, "--extract_jobs", "4")
+    parallel = {
+        path.name: path.read_text() for path in (tmp_path / "clips").glob("*.aif")
+    }
+
+    assert serial
+    assert parallel == serial
+
+
+def test_extract_jobs_must_be_positive(
+    dropseeker_process: Callable[..., subprocess.CompletedProcess],
+) -> None:
+    result = dropseeker_process(*SEARCH, "--extract", "--extract_jobs", "0")
+    assert result.returncode == 1
+    assert "--extract_jobs must be at least 1." in result.stderr
@@ -0,0 +1,59 @@
+"""
+Every --search term is matched in a single pass, and --use_index narrows the
+scan through the word index; both must find exactly what scanning each
+transcript for each term does.
+"""
+
+from __future__ import annotations
+
+import collections
+from typing import Callable, List
+
+import pytest
+
+QUERIES = [
+    ["--search", "the"],
+    ["--search", "great day"],
+    ["--search", "the * the"],
+    ["--search", "chili*"],
+    ["--search", "d*g*s"],
+    ["--search", "*s"],
+    ["--search", "."],
+    ["--search", "#1"],
+    ["--search", "don't", "--prefix_words", "0", "--suffix_words", "0"],
+    ["--search", "i", "--icontext", "doughboys", "--context_exclude", "world"],
+    ["--search", "the", "--search", "i", "--limit_per_episode", "3"],
+    ["--search", "the", "--search", "you know", "--limit", "20"],
+    ["--search", "the world", "--min_duration", "3"],
+    ["--search", "great", "--match", "Episode 1", "--podcast", "spoon"],
+]
+
+
+def match_blocks(output: str) -> List[str]:
+    # The first line is the conf defaults; each match after that is a
+    # heading line and its tab-indented context.
+    matches = output.split("\n", 1)[1]
+    return [block for block in matches.split("\n\n") if "\t" in block]
+
+
+@pytest.mark.parametrize("query", QUERIES, ids=" ".join)
+def test_use_index_matches_scan(
+    run_dropseeker: Callable[..., str], query: List[str]
+) -> None:
+    scanned = run_dropseeker(*query, "--no_cache")
+    indexed = run_dropseeker(*query, "--no_cache", "--use_index")
+    assert match_blocks(scanned)
+    assert indexed == scanned
+
+
+def test_single_pass_matches_each_term(run_dropseeker: Callable[..., str]) -> None:
+    terms = ["the", "great day", "chili*", "d*g*s", ".", "#1", "the * the"]
+    args = [arg for term in terms for arg in ("--search", term)]
+
+    combined = collections.Counter(match_blocks(run_dropseeker(*args, "--no_cache")))
+    separate: collections.Counter = collections.Counter()
+    for term in terms:
+        separate.update(match_blocks(run_dropseeker("--search", term, "--no_cache")))
+
+    assert combined
+    assert combined == separate
@@ -0,0 +1,103 @@
+"""
+--queries_file runs every saved search in one pass; each search's results
+must be what running it on its own prints.
+"""
+
+from __future__ import annotations
+
+import re
+import subprocess
+from pathlib import Path
+from typing import Callable, List
+
+import pytest
+
+QUERIES_FILE = """\
+# Saved searches.
+great day
+chili* --icontext fries --limit 3
+
+--query "great NEAR/2 day" --limit_per_episode 1
+the --context_exclude world --search "#1" --limit_per_episode 2
+"""
+
+# Each line above, as a command line of its own.
+SEPARATE_ARGS = [
+    ["--search", "great day"],
+    ["--search", "chili*", "--icontext", "fries", "--limit", "3"],
+    ["--query", "great NEAR/2 day", "--limit_per_episode", "1"],
+    [
+        "--search",
+        "the",
+        "--context_exclude",
+        "world",
+        "--search",
+        "#1",
+        "--limit_per_episode",
+        "2",
+    ],
+]
+
+
+def test_each_search_matches_a_separate_run(
+    run_dropseeker: Callable[..., str], tmp_path: Path
+) -> None:
+    queries_file = tmp_path / "queries.txt"
+    queries_file.write_text(QUERIES_FILE, encoding="utf-8")
+
+    output = run_dropseeker("--queries_file", str(queries_file), "--no_cache")
+    # The conf defaults, then a "== line ==" heading and results per search.
+    parts = re.split(r"^== (.*) ==\n\n", output.split("\n", 1)[1], flags=re.M)
+    labels, results = parts[1::2], parts[2::2]
+
+    # Headings requote the line's words, so they read as a shell command line.
+    assert labels == [
+        "great day",
+        "'chili*' --icontext fries --limit 3",
+        "--query 'great NEAR/2 day' --limit_per_episode 1",
+        "the --context_exclude world --search '#1' --limit_per_episode 2",
+    ]
+    for args, result in zip(SEPARATE_ARGS, results):
+        separate = run_dropseeker(*args, "--no_cache").split("\n", 1)[1]
+        assert "\t" in separate
+        assert result == separate
+
+
+@pytest.mark.parametrize(
+    "contents, error",
+    [
+        ("great day\n--limit 5\n", "queries.txt:2: no search or query: --limit 5"),
+        ('great\n\n"never closed\n', "queries.txt:3: No closing quotation"),
+        ("great --bogus 1\n", "queries.txt:1: invalid search: great --bogus 1"),
+        ("great --limit many\n", "queries.txt:1: invalid search: great --limit many"),
+        ("# nothing here\n\n", "No searches in --queries_file"),
+    ],
+)
+def test_errors_name_the_line(
+    dropseeker_process: Callable[..., subprocess.CompletedProcess],
+    tmp_path: Path,
+    contents: str,
+    error: str,
+) -> None:
+    queries_file = tmp_path / "queries.txt"
+    queries_file.write_text(contents, encoding="utf-8")
+
+    result = dropseeker_process("--queries_file", str(queries_file))
+
+    assert result.returncode == 1
+    assert error in result.stderr
+
+
+@pytest.mark.parametrize("extra", [["--search", "great"], ["--watch"]])
+def test_cannot_combine_with_other_searches(
+    dropseeker_process: Callable[..., subprocess.CompletedProcess],
+    tmp_path: Path,
+    extra: List[str],
+) -> None:
+    queries_file = tmp_path / "queries.txt"
+    queries_file.write_text("great day\n", encoding="utf-8")
+
+    result = dropseeker_process("--queries_file", str(queries_file), *extra)
+
+    assert result.returncode == 1
+    assert "--queries_file can't be combined with" in result.stderr
@@ -0,0 +1,57 @@
+"""
+--query operators: a window where the operands occur many times is still
+one match.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable, List
+
+import pytest
+
+FILLER = " ".join(["filler"] * 30)
+
+TRANSCRIPT = f"""WEBVTT
+
+00:00.000 --> 00:05.000
+great day great great day day great
+
+00:05.000 --> 00:20.000
+{FILLER}
+
+00:20.000 --> 00:25.000
+day and then great
+"""
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("great AND day", ["00:00.000", "00:20.000"]),
+        ("great NEAR/2 day", ["00:00.000", "00:20.000"]),
+        ("great ONEAR/2 day", ["00:00.000"]),
+        ("(great AND day) OR then", ["00:00.000", "00:20.000", "00:20.000"]),
+    ],
+)
+def test_dense_query_gives_one_match_per_window(
+    run_dropseeker: Callable[..., str],
+    tmp_path: Path,
+    query: str,
+    expected: List[str],
+) -> None:
+    podcast_dir = tmp_path / "transcripts" / "Show"
+    podcast_dir.mkdir(parents=True)
+    (podcast_dir / "2024-01-01 - Pilot (guid=abc).vtt").write_text(
+        TRANSCRIPT, encoding="utf-8"
+    )
+
+    output = run_dropseeker(
+        "--transcript_dir", str(tmp_path / "transcripts"), "--query", query
+    )
+    starts = [
+        line.rsplit(" @ ", 1)[1].rstrip(":")
+        for line in output.splitlines()
+        if " @ " in line
+    ]
+    assert starts == expected
@@ -0,0 +1,115 @@
+"""
+--serve answers searches over HTTP; requests may set search and filter
+options only.
+"""
+
+from __future__ import annotations
+
+import json
+import socket
+import subprocess
+import sys
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple
+
+import pytest
+
+from conftest import SCRIPT
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def server_url(corpus: Path, tmp_path: Path) -> Iterator[str]:
+    port = _free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            str(SCRIPT),
+            "--transcript_dir",
+            str(corpus / "transcripts"),
+            "--episode_dir",
+            str(corpus / "episodes"),
+            "--cache_dir",
+            str(tmp_path / "cache"),
+            "--serve",
+            "--port",
+            str(port),
+        ],
+        cwd=tmp_path,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    try:
+        assert process.stdout is not None
+        for line in process.stdout:
+            if line.startswith("Serving"):
+                break
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def post(url: str, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    request = urllib.request.Request(
+        url + "/search", data=json.dumps(body).encode("utf-8"), method="POST"
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_request_searches(server_url: str) -> None:
+    status, result = post(server_url, {"search": ["great day"], "limit": 2})
+    assert status == 200
+    assert len(result["matches"]) == 2
+    assert result["matches"][0]["search_term"] == "great day"
+
+
+@pytest.mark.parametrize(
+    "key, value",
+    [
+        ("use_index", True),
+        ("build_index", True),
+        ("extract", True),
+        ("supercut", "/tmp/supercut.aif"),
+        ("cache_dir", "/tmp/elsewhere"),
+        ("output_dir", "/tmp/elsewhere"),
+        ("stats_json", "/tmp/stats.json"),
+    ],
+)
+def test_request_cannot_set_other_options(
+    server_url: str, tmp_path: Path, key: str, value: Any
+) -> None:
+    status, result = post(server_url, {"search": ["the"], key: value})
+    assert status == 400
+    assert result["error"] == f"--{key} can't be set per request."
+    assert not (tmp_path / "cache" / "index.sqlite").exists()
+
+
+def test_serve_refuses_extract(corpus: Path, tmp_path: Path) -> None:
+    result = subprocess.run(
+        [
+            sys.executable,
+            str(SCRIPT),
+            "--transcript_dir",
+            str(corpus / "transcripts"),
+            "--serve",
+            "--extract",
+        ],
+        cwd=tmp_path,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 1
+    assert "--serve can't be combined with --extract" in result.stderr
@@ -0,0 +1,91 @@
+"""
+Transcripts are parsed by a streaming parser and kept in a binary cache;
+either way, the output must be byte-for-byte what the line-based parser
+printed.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable, List
+
+import pytest
+
+QUERIES = [
+    ["--search", "the"],
+    ["--search", "great day", "--prefix_words", "8", "--suffix_words", "8"],
+    ["--search", "chili*", "--search", "#1", "--search", "."],
+    ["--search", "ΟΔΟΣ", "--icontext", "οδος"],
+    ["--search", "i", "--context", "Doughboys", "--limit_per_episode", "2"],
+    ["--search", "the world", "--min_duration", "3"],
+]
+
+PILOT = """WEBVTT
+
+00:00.000 --> 00:02.500
+Hello and welcome to the show.
+
+00:02.500 --> 00:05.000
+Today we're having a great day, a really great
+
+00:05.000 --> 00:07.250
+day at Chili's with #1 fries.
+"""
+
+# What the line-based parser printed for PILOT.
+PILOT_OUTPUT = """{}
+Show/2024-01-01 - Pilot @ 00:02.500:
+\thaving a great day, a really great
+
+Show/2024-01-01 - Pilot @ 00:02.500:
+\ta really great day at Chili's with
+
+Show/2024-01-01 - Pilot @ 00:05.000:
+\tday at Chili's with #1 fries.
+
+"""
+
+
+@pytest.mark.parametrize("query", QUERIES, ids=" ".join)
+def test_cached_transcripts_match_parsed(
+    run_dropseeker: Callable[..., str], tmp_path: Path, query: List[str]
+) -> None:
+    parsed = run_dropseeker(*query, "--no_cache", "--no_transcript_cache")
+    written = run_dropseeker(*query, "--no_cache")
+    assert list((tmp_path / "cache" / "transcripts").glob("*.bin"))
+    cached = run_dropseeker(*query, "--no_cache")
+
+    assert "\t" in parsed
+    assert written == parsed
+    assert cached == parsed
+
+
+@pytest.mark.parametrize("transcript_cache", [False, True])
+def test_output_matches_line_based_parser(
+    run_dropseeker: Callable[..., str], tmp_path: Path, transcript_cache: bool
+) -> None:
+    podcast_dir = tmp_path / "transcripts" / "Show"
+    podcast_dir.mkdir(parents=True)
+    (podcast_dir / "2024-01-01 - Pilot (guid=abc).vtt").write_text(
+        PILOT, encoding="utf-8"
+    )
+
+    args = [
+        "--transcript_dir",
+        str(tmp_path / "transcripts"),
+        "--search",
+        "great day",
+        "--search",
+        "chili*",
+        "--prefix_words",
+        "2",
+        "--suffix_words",
+        "3",
+        "--no_cache",
+    ]
+    if not transcript_cache:
+        args.append("--no_transcript_cache")
+
+    # The second run reads the binary cache written by the first.
+    assert run_dropseeker(*args) == PILOT_OUTPUT
+    assert run_dropseeker(*args) == PILOT_OUTPUT